@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SVG/PNG图标转换器性能基准
+生成合成测试素材，分别测量各转换环节的耗时，结果保存为JSON并可与历史结果对比
+
+    python benchmark.py run -o results.json
+    python benchmark.py compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from convert import SVGIconConverter, SVGRenderSession, PNGRenderSession, unsharp_mask_premultiplied
+
+RESULTS_VERSION = 1
+
+# 启动耗时预算 (python convert.py --help 在解释器自身启动之外的模块导入耗时)
+DEFAULT_STARTUP_BUDGET_MS = 75
+
+SVG_HEADER = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 512 512">'
+
+def _random_path(rng, points):
+    coords = " ".join(f"L{rng.uniform(0, 512):.2f},{rng.uniform(0, 512):.2f}" for _ in range(points))
+    return f"M{rng.uniform(0, 512):.2f},{rng.uniform(0, 512):.2f} {coords} Z"
+
+def make_simple_svg(rng):
+    """简单几何图标"""
+    return (f'{SVG_HEADER}'
+            f'<rect x="32" y="32" width="448" height="448" rx="96" fill="#3b82f6"/>'
+            f'<circle cx="256" cy="256" r="{rng.randint(80, 160)}" fill="#ffffff"/>'
+            f'</svg>')
+
+def make_path_heavy_svg(rng):
+    """大量复杂路径"""
+    paths = "".join(
+        f'<path d="{_random_path(rng, 120)}" fill="#{rng.randrange(0xffffff):06x}" fill-opacity="0.6"/>'
+        for _ in range(200))
+    return f'{SVG_HEADER}{paths}</svg>'
+
+def make_effects_svg(rng):
+    """大量渐变和滤镜效果"""
+    defs = []
+    shapes = []
+    for i in range(12):
+        defs.append(
+            f'<linearGradient id="lg{i}" x1="0" y1="0" x2="1" y2="1">'
+            f'<stop offset="0" stop-color="#{rng.randrange(0xffffff):06x}"/>'
+            f'<stop offset="1" stop-color="#{rng.randrange(0xffffff):06x}"/></linearGradient>'
+            f'<radialGradient id="rg{i}"><stop offset="0" stop-color="#ffffff"/>'
+            f'<stop offset="1" stop-color="#{rng.randrange(0xffffff):06x}" stop-opacity="0.3"/></radialGradient>'
+            f'<filter id="f{i}"><feGaussianBlur stdDeviation="{rng.uniform(1, 8):.1f}"/></filter>')
+        shapes.append(
+            f'<circle cx="{rng.randint(64, 448)}" cy="{rng.randint(64, 448)}" r="{rng.randint(40, 120)}" '
+            f'fill="url(#{"lg" if i % 2 else "rg"}{i})" filter="url(#f{i})"/>')
+    return f'{SVG_HEADER}<defs>{"".join(defs)}</defs>{"".join(shapes)}</svg>'
+
+def make_text_heavy_svg(rng):
+    """大量文本元素"""
+    texts = "".join(
+        f'<text x="{rng.randint(0, 400)}" y="{rng.randint(20, 500)}" font-size="{rng.randint(6, 40)}" '
+        f'font-family="sans-serif" fill="#222">Icon {i}</text>'
+        for i in range(40))
+    return f'{SVG_HEADER}{texts}</svg>'
+
+SVG_CORPUS = {
+    'simple': make_simple_svg,
+    'path-heavy': make_path_heavy_svg,
+    'effects-heavy': make_effects_svg,
+    'text-heavy': make_text_heavy_svg,
+}
+
+PNG_CORPUS = {
+    'png-small': 64,
+    'png-huge': 4096,
+}
+
+def make_png(path, size, rng):
+    """生成带透明背景和抗锯齿边缘的PNG"""
+    from PIL import Image, ImageDraw
+    image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for _ in range(24):
+        x0, y0 = rng.randint(0, size // 2), rng.randint(0, size // 2)
+        x1, y1 = x0 + rng.randint(size // 8, size // 2), y0 + rng.randint(size // 8, size // 2)
+        draw.ellipse((x0, y0, x1, y1), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.randint(96, 255)))
+    image.save(path)
+
+def build_corpus(corpus_dir, copies, with_svg):
+    """生成合成测试素材，返回 {类别: [文件路径, ...]}"""
+    rng = random.Random(20240601)
+    input_dir = corpus_dir / "input"
+    input_dir.mkdir(parents=True, exist_ok=True)
+    corpus = {}
+    if with_svg:
+        for kind, make in SVG_CORPUS.items():
+            corpus[kind] = []
+            for i in range(copies):
+                path = input_dir / f"{kind}-{i}.svg"
+                path.write_text(make(rng), encoding='utf-8')
+                corpus[kind].append(path)
+    for kind, size in PNG_CORPUS.items():
+        corpus[kind] = []
+        for i in range(copies):
+            path = input_dir / f"{kind}-{i}.png"
+            make_png(path, size, rng)
+            corpus[kind].append(path)
+    return corpus
+
+def peak_rss_kb():
+    """进程峰值内存 (KB)，平台不支持时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def reset_peak_rss():
+    """把进程的峰值内存重置为当前值 (Linux /proc/self/clear_refs)，不支持时返回False"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+def peak_rss_since_reset_kb():
+    """上次reset_peak_rss()以来的峰值内存 (KB)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def measure(name, func, items, repeat, icons=None):
+    """对每个条目调用func，取多次重复中最快的一次；func返回本次处理的字节数
+    
+    icons 为每次重复实际处理的图标数，默认等于条目数。
+    peak_rss_kb 为该项基准运行期间的峰值内存，只在能重置峰值的平台 (Linux) 上记录，其他平台为None
+    """
+    icons = len(items) if icons is None else icons
+    per_case_peak = reset_peak_rss()
+    best = None
+    processed_bytes = 0
+    for _ in range(repeat):
+        processed_bytes = 0
+        start = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            for item in items:
+                processed_bytes += func(item) or 0
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    result = {
+        'name': name,
+        'icons': icons,
+        'seconds': best,
+        'icons_per_s': icons / best if best else None,
+        'bytes': processed_bytes,
+        'bytes_per_s': processed_bytes / best if best else None,
+        'peak_rss_kb': peak_rss_since_reset_kb() if per_case_peak else None,
+    }
+    print(f"  {name:<40} {best * 1000:9.1f} ms  {result['icons_per_s'] or 0:9.1f} icons/s")
+    return result
+
+def _import_times(args):
+    """运行 python -X importtime，返回 (顶层模块累计导入耗时 µs, 导入的模块名集合)"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True, text=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)", line)
+        if not match:
+            continue
+        modules.add(match.group(3))
+        # 只累加顶层模块的累计耗时，避免重复计算
+        if len(match.group(2)) == 1:
+            total_us += int(match.group(1))
+    return total_us, modules
+
+def measure_startup(budget_ms):
+    """用 -X importtime 测量 convert.py --help 的模块导入耗时
+    
+    扣除解释器自身启动时的导入 (python -c pass)，只统计转换器带来的部分
+    """
+    script = Path(__file__).with_name("convert.py")
+    baseline_us, baseline_modules = _import_times(["-c", "pass"])
+    start = time.perf_counter()
+    total_us, modules = _import_times([str(script), "--help"])
+    wall = time.perf_counter() - start
+    import_ms = max(total_us - baseline_us, 0) / 1000
+    heavy = sorted(m for m in modules - baseline_modules
+                   if m.split('.')[0] in ('PIL', 'cairosvg', 'cairocffi'))
+    result = {
+        'name': 'startup (convert.py --help)',
+        'import_ms': import_ms,
+        'wall_ms': wall * 1000,
+        'budget_ms': budget_ms,
+        'heavy_imports': heavy,
+        'within_budget': import_ms <= budget_ms and not heavy,
+    }
+    status = "✓" if result['within_budget'] else "❌"
+    print(f"  {status} 启动导入耗时 {result['import_ms']:.1f} ms (预算 {budget_ms} ms)")
+    if heavy:
+        print(f"  ❌ --help 加载了重量级依赖: {', '.join(heavy)}")
+    return result
+
+def _cairosvg_available():
+    try:
+        import cairosvg.surface
+    except (ImportError, OSError):
+        return False
+    return True
+
+def environment():
+    from importlib.metadata import PackageNotFoundError, version
+    versions = {}
+    for package in ('pillow', 'cairosvg'):
+        try:
+            versions[package] = version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        **versions,
+    }
+
+def run_benchmarks(args):
+    workdir = Path(tempfile.mkdtemp(prefix="icon-benchmark-"))
+    results = {'version': RESULTS_VERSION, 'environment': environment(), 'benchmarks': []}
+    benchmarks = results['benchmarks']
+    try:
+        with_svg = _cairosvg_available()
+        if not with_svg:
+            print("⚠️ cairosvg不可用，跳过SVG相关基准")
+        print("生成测试素材...")
+        corpus = build_corpus(workdir / "corpus", args.copies, with_svg)
+
+        converter = SVGIconConverter()
+        converter.input_dir = workdir / "corpus" / "input"
+        converter.output_dir = workdir / "output"
+        converter.ensure_directories()
+        sizes = converter.png_sizes
+
+        print("\n⏱️ 启动")
+        benchmarks.append(measure_startup(args.startup_budget_ms))
+
+        print("\n⏱️ svg_to_png")
+        for kind in SVG_CORPUS if with_svg else ():
+            def render_svg(path):
+                session = SVGRenderSession(path)
+                for size in sizes:
+                    converter.svg_to_png(path, size, session)
+                return len(session.data)
+            benchmarks.append(measure(
+                f"svg_to_png[{kind}]", render_svg, corpus[kind], args.repeat,
+                icons=len(corpus[kind]) * len(sizes)))
+
+        print("\n⏱️ png_to_resized_png")
+        for kind in PNG_CORPUS:
+            def resize_png(path):
+                session = PNGRenderSession(path)
+                for size in sizes:
+                    converter.png_to_resized_png(path, size, session)
+                return len(session.data)
+            benchmarks.append(measure(
+                f"png_to_resized_png[{kind}]", resize_png, corpus[kind], args.repeat,
+                icons=len(corpus[kind]) * len(sizes)))
+
+        # 编码和ICO基准使用固定的帧，只测量编码本身
+        frames = {}
+        source = PNGRenderSession(corpus['png-huge'][0])
+        for size in sorted(set(sizes) | set(converter.ico_sizes)):
+            frames[size] = source.resize(size)
+        # 释放原图和降采样金字塔，不计入后续基准的峰值内存
+        del source
+
+        print("\n⏱️ create_ico")
+        ico_frames = [frames[size] for size in converter.ico_sizes]
+        benchmarks.append(measure(
+            "create_ico", lambda _: len(converter.create_ico(ico_frames) or b''),
+            range(args.copies * 4), args.repeat))
+
+        print("\n⏱️ sharpen")
+        small_frames = [frames[size] for size in sorted(frames) if size <= converter.sharpen_max_size]
+        def sharpen(image):
+            unsharp_mask_premultiplied(image, **converter.sharpen_options)
+            return image.size[0] * image.size[1] * 4
+        benchmarks.append(measure("sharpen", sharpen, small_frames * args.copies * 16, args.repeat))
+
+        print("\n⏱️ save_png_optimized")
+        for preset in ('fast', 'balanced', 'max'):
+            converter.set_encoder_preset(preset)
+            target = workdir / "encode.png"
+            def encode(size):
+                converter.save_png_optimized(frames[size], target)
+                return target.stat().st_size
+            benchmarks.append(measure(f"save_png_optimized[{preset}]", encode, sizes, args.repeat))
+        converter.set_encoder_preset('balanced')
+
+        print("\n⏱️ convert_all")
+        def convert_all(_):
+            shutil.rmtree(converter.output_dir, ignore_errors=True)
+            converter.convert_all(force=True)
+            return sum(path.stat().st_size for paths in corpus.values() for path in paths)
+        files = [path for paths in corpus.values() for path in paths]
+        benchmarks.append(measure("convert_all", convert_all, [None], args.repeat, icons=len(files)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # 重置峰值后ru_maxrss只反映最后一次重置以来的峰值，整个运行的峰值取各项中的最大值
+    peaks = [b['peak_rss_kb'] for b in benchmarks if b.get('peak_rss_kb')] + [peak_rss_kb() or 0]
+    results['peak_rss_kb'] = max(peaks) or None
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 结果已保存: {args.output}")
+
+    startup = benchmarks[0]
+    return 0 if startup['within_budget'] else 1
+
+def compare_results(args):
+    """对比两次基准结果，耗时增加超过阈值的条目视为性能回退"""
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = {b['name']: b for b in json.load(f)['benchmarks']}
+    with open(args.current, encoding='utf-8') as f:
+        current = {b['name']: b for b in json.load(f)['benchmarks']}
+
+    regressions = []
+    print(f"{'基准':<40} {'基线':>10} {'当前':>10} {'变化':>8}")
+    print("-" * 72)
+    for name, new in current.items():
+        old = baseline.get(name)
+        key = 'seconds' if 'seconds' in new else 'import_ms'
+        if not old or not old.get(key) or new.get(key) is None:
+            print(f"{name:<40} {'-':>10} {new.get(key, 0):>10.4f} {'新增':>8}")
+            continue
+        change = (new[key] - old[key]) / old[key] * 100
+        mark = ""
+        if change > args.threshold:
+            regressions.append(name)
+            mark = " ❌"
+        print(f"{name:<40} {old[key]:>10.4f} {new[key]:>10.4f} {change:>+7.1f}%{mark}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项性能回退超过 {args.threshold}%:")
+        for name in regressions:
+            print(f"  • {name}")
+        return 1
+    print(f"\n✅ 没有超过 {args.threshold}% 的性能回退")
+    return 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SVG/PNG图标转换器性能基准")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="运行基准测试")
+    run.add_argument("-o", "--output", default="benchmark-results.json", help="结果文件 (默认: benchmark-results.json)")
+    run.add_argument("--copies", type=int, default=3, help="每类素材的文件数 (默认: 3)")
+    run.add_argument("--repeat", type=int, default=3, help="每项基准重复次数，取最快一次 (默认: 3)")
+    run.add_argument(
+        "--startup-budget-ms", type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+        help=f"convert.py --help 的导入耗时预算，不含解释器自身启动 (默认: {DEFAULT_STARTUP_BUDGET_MS} ms)",
+    )
+
+    compare = commands.add_parser('compare', help="对比两次基准结果")
+    compare.add_argument("baseline", help="基线结果文件")
+    compare.add_argument("current", help="当前结果文件")
+    compare.add_argument("--threshold", type=float, default=10.0, help="视为回退的耗时增幅百分比 (默认: 10)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("⏱️ SVG/PNG图标转换器性能基准")
+    print("=" * 50)
+    if args.command == 'run':
+        return run_benchmarks(args)
+    return compare_results(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
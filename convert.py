@@ -7,305 +7,1431 @@ SVG/PNG图标转换器
 
 import os
 import sys
+import argparse
+import hashlib
+import json
+import time
+import struct
+from contextlib import nullcontext, redirect_stdout
+from io import BytesIO, StringIO
 from pathlib import Path
-from PIL import Image, ImageOps
-import cairosvg
-from io import BytesIO
+
+from metrics import ConversionMetrics
+from profiles import SIZE_PROFILES, load_config, resolve_profile
+
+# PIL、cairosvg和进程池等较重的依赖只在实际用到的代码路径中导入，
+# 使 --help、空输入目录、只有PNG输入等情况下启动更快
+
+# 增量构建清单，保存在输出目录中
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 2
+
+# 单一归档模式下整个批次共用的归档名 (不含扩展名)，保存在输出目录中
+BATCH_ARCHIVE_NAME = "icons"
+
+# PNG编码预设
+PNG_ENCODER_PRESETS = {
+    # 开发调试：低压缩级别，不做优化
+    'fast': {'save_options': {'optimize': False, 'compress_level': 1}, 'quantize': False},
+    # 默认：平衡文件大小和编码速度
+    'balanced': {'save_options': {'optimize': True, 'compress_level': 6}, 'quantize': False},
+    # 发布：最高压缩，颜色不超过256种的图标无损转换为调色板
+    'max': {'save_options': {'optimize': True, 'compress_level': 9}, 'quantize': True},
+}
+
+def new_encode_stats():
+    """PNG编码统计：文件数、原始RGBA字节数、写入字节数、耗时"""
+    return {'files': 0, 'raw_bytes': 0, 'bytes': 0, 'seconds': 0.0}
+
+def format_bytes(num):
+    """格式化字节数"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(num) < 1024:
+            return f"{num:.1f}{unit}" if unit != 'B' else f"{num}{unit}"
+        num /= 1024
+    return f"{num:.1f}GB"
+
+def quantize_lossless(image):
+    """颜色不超过256种时无损转换为调色板图像，否则返回None"""
+    from PIL import Image
+    if image.getcolors(256) is None:
+        return None
+    quantized = image.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+    # 只在转换完全无损时使用
+    if quantized.convert('RGBA').tobytes() != image.tobytes():
+        return None
+    return quantized
+
+def unsharp_mask_premultiplied(image, radius=0.5, percent=150, threshold=0):
+    """在预乘透明度空间中对RGBA图像做USM锐化
+    
+    预乘后透明像素不带颜色，锐化时不会把透明区域的颜色拉到半透明边缘形成色晕。
+    透明度通道与直接锐化的结果相同；模糊核会读取相邻半透明像素的预乘值，
+    靠近边缘的不透明像素的颜色与直接锐化的结果略有差异
+    """
+    from PIL import ImageFilter
+    unsharp = ImageFilter.UnsharpMask(radius=radius, percent=percent, threshold=threshold)
+    return image.convert('RGBa').filter(unsharp).convert('RGBA')
+
+def _ico_bmp_entry(image):
+    """将RGBA图像编码为ICO中的BMP条目：32位BGRA像素 + 1位AND掩码，自下而上存储"""
+    from PIL import Image
+    width, height = image.size
+    header = struct.pack('<IiiHHIIiiII', 40, width, height * 2, 1, 32, 0, 0, 0, 0, 0, 0)
+    flipped = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+    pixels = flipped.tobytes('raw', 'BGRA')
+    # AND掩码：完全透明的像素置1，每行按4字节对齐
+    mask = flipped.getchannel('A').point(lambda a: 255 if a == 0 else 0).convert('1')
+    row_bytes = (width + 7) // 8
+    padding = b'\0' * ((-row_bytes) % 4)
+    mask_data = mask.tobytes()
+    mask_rows = b''.join(mask_data[y * row_bytes:(y + 1) * row_bytes] + padding
+                         for y in range(height))
+    return header + pixels + mask_rows
+
+def write_ico(images, fileobj, bmp_max_size=0, png_options=None):
+    """将已渲染好的各尺寸图像直接写入ICO容器，不再重新缩放
+    
+    尺寸不超过bmp_max_size的帧写为BMP条目 (兼容旧版Windows)，其余写为PNG条目。
+    先写占位目录，逐帧写入数据后再回填目录，不在内存中拼接整个文件
+    """
+    frames = sorted(images, key=lambda img: img.size[0])
+    for image in frames:
+        if max(image.size) > 256:
+            raise ValueError(f"ICO不支持超过256px的尺寸: {image.size[0]}x{image.size[1]}")
+    
+    start = fileobj.tell()
+    fileobj.write(struct.pack('<HHH', 0, 1, len(frames)))
+    fileobj.write(b'\0' * 16 * len(frames))
+    
+    entries = []
+    for image in frames:
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        offset = fileobj.tell()
+        if max(image.size) <= bmp_max_size:
+            fileobj.write(_ico_bmp_entry(image))
+        else:
+            image.save(fileobj, 'PNG', **(png_options or {}))
+        length = fileobj.tell() - offset
+        width, height = image.size
+        # 256px 在目录中记为 0
+        entries.append(struct.pack('<BBBBHHII', width % 256, height % 256, 0, 0, 1, 32,
+                                   length, offset - start))
+    
+    end = fileobj.tell()
+    fileobj.seek(start + 6)
+    fileobj.write(b''.join(entries))
+    fileobj.seek(end)
+
+def file_sha256(path):
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ConversionError(Exception):
+    """库接口 convert() 中有图标生成失败"""
+
+class ConversionCancelled(Exception):
+    """文件在转换过程中被再次修改，本次转换已取消"""
+
+class RenderFailed(Exception):
+    """所有尺寸共用的源图像无法渲染，该文件的其余尺寸不再尝试"""
+
+class RenderCache:
+    """按内容寻址的渲染结果缓存，可跨运行、跨进程共享同一目录
+    
+    键由 (源文件哈希, 尺寸, DPI, 锐化参数, 渲染器版本) 计算得到，
+    超过容量上限时按最近使用时间 (LRU) 清理
+    """
+    
+    # 渲染流程变化时递增，使旧缓存失效
+    VERSION = 3
+    
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._renderer_version = None
+    
+    def key(self, *parts):
+        """由渲染参数计算缓存键"""
+        data = json.dumps([self.VERSION, self.renderer_version(), *parts], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+    
+    def renderer_version(self):
+        """渲染依赖的版本，只在第一次使用时读取"""
+        if self._renderer_version is None:
+            # 通过包元数据读取版本，避免为PNG输入加载cairo
+            from importlib.metadata import PackageNotFoundError, version
+            versions = []
+            for package in ('cairosvg', 'pillow'):
+                try:
+                    versions.append(f"{package}-{version(package)}")
+                except PackageNotFoundError:
+                    versions.append(f"{package}-unknown")
+            self._renderer_version = "/".join(versions)
+        return self._renderer_version
+    
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.png"
+    
+    def get(self, key):
+        """读取缓存的图像，未命中时返回None"""
+        from PIL import Image
+        path = self._path(key)
+        try:
+            with Image.open(path) as cached:
+                image = cached.convert('RGBA')
+            # 更新访问时间，用于LRU清理
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return image
+    
+    def put(self, key, image):
+        """原子写入缓存，多个进程同时写入同一键也是安全的"""
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            image.save(tmp_path, "PNG", compress_level=1)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入渲染缓存失败 {path}: {e}")
+    
+    def prune(self):
+        """按最近使用时间清理缓存，直到总大小不超过上限"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.png"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+def _copy_svg_node(node, parent=None):
+    """复制cairosvg文档树的节点及其全部子节点
+    
+    只复制节点自身的属性字典和子节点列表，XML元素和样式规则仍然共享，不需要重新解析
+    """
+    copy = node.__class__.__new__(node.__class__)
+    dict.update(copy, node)
+    copy.__dict__.update(node.__dict__)
+    if parent is not None:
+        copy.parent = parent
+    copy.children = [_copy_svg_node(child, copy) for child in node.children]
+    return copy
+
+class SVGRenderSession:
+    """SVG渲染会话：只读取和解析一次SVG文件，复用文档树渲染所有尺寸
+    
+    文档树在第一次渲染时才解析，渲染缓存全部命中时无需解析。
+    data为内存中的SVG内容，None时从svg_path读取
+    """
+    
+    def __init__(self, svg_path, data=None):
+        self.svg_path = Path(svg_path)
+        self.data = self.svg_path.read_bytes() if data is None else data
+        self.source_hash = hashlib.sha256(self.data).hexdigest()
+        self._tree = None
+    
+    @property
+    def tree(self):
+        if self._tree is None:
+            import cairosvg.parser
+            # 只解析一次，url用于解析SVG内的相对引用
+            self._tree = cairosvg.parser.Tree(
+                bytestring=self.data,
+                url=str(self.svg_path),
+            )
+        return self._tree
+    
+    def render(self, size, dpi):
+        """将已解析的文档树绘制到指定尺寸的PNG表面，返回PNG字节流
+        
+        cairosvg绘制时会修改文档树 (如把mask和pattern节点改为g、把pattern的宽高换算为绝对值)，
+        每次绘制使用文档树的副本，后续尺寸仍从未修改的文档树开始
+        """
+        import cairosvg.surface
+        output = BytesIO()
+        surface = cairosvg.surface.PNGSurface(
+            _copy_svg_node(self.tree),
+            output,
+            dpi,
+            output_width=size,
+            output_height=size,
+            background_color=None,  # 保持透明背景
+        )
+        surface.finish()
+        return output.getvalue()
+
+class PNGRenderSession:
+    """PNG渲染会话：只解码一次源PNG，通过缓存的降采样金字塔生成各尺寸
+    
+    图像在第一次缩放时才解码，渲染缓存全部命中时无需解码。
+    data为内存中的PNG内容，None时从png_path读取
+    """
+    
+    # 解码源图像计入的计时阶段
+    decode_stage = 'parse'
+    
+    def __init__(self, png_path, data=None):
+        from PIL import Image
+        self.png_path = Path(png_path)
+        # 只读取文件头获取尺寸
+        with Image.open(self.png_path if data is None else BytesIO(data)) as original_image:
+            self.size = original_image.size
+        self.data = self.png_path.read_bytes() if data is None else data
+        self.source_hash = hashlib.sha256(self.data).hexdigest()
+        self._image = None
+        self._pyramid = None
+    
+    @property
+    def image(self):
+        if self._image is None:
+            from PIL import Image
+            with Image.open(BytesIO(self.data)) as original_image:
+                # 确保是RGBA模式以保持透明度
+                self._image = original_image.convert('RGBA')
+            # 金字塔使用预乘透明度，避免透明边缘在降采样时产生色晕
+            self._pyramid = [self._image.convert('RGBa')]
+        return self._image
+    
+    def _pyramid_level(self, size):
+        """返回不小于目标尺寸2倍的最小金字塔层，按需用reduce(2)逐级生成"""
+        self.image
+        level = self._pyramid[0]
+        for level in self._pyramid:
+            if min(level.size) < size * 4:
+                return level
+        while min(level.size) >= size * 4:
+            level = level.reduce(2)
+            self._pyramid.append(level)
+        return level
+    
+    def resize(self, size):
+        """生成指定尺寸的RGBA图像：金字塔预缩小 + 最终LANCZOS重采样"""
+        from PIL import Image
+        if self.size == (size, size):
+            return self.image.copy()
+        level = self._pyramid_level(size)
+        return level.resize((size, size), Image.Resampling.LANCZOS).convert('RGBA')
+
+class SupersampleRenderSession(PNGRenderSession):
+    """SVG超采样会话：只在render_size渲染一次SVG，其余尺寸像PNG输入一样由降采样金字塔生成
+    
+    高分辨率图像在第一次缩放时才渲染，渲染缓存全部命中时无需渲染。
+    渲染失败时记住失败，不再为其余尺寸重复渲染
+    """
+    
+    # 高分辨率渲染已由svg_to_png计入rasterize阶段
+    decode_stage = None
+    
+    def __init__(self, svg_session, render_size, render):
+        self.png_path = svg_session.svg_path
+        self.size = (render_size, render_size)
+        self.data = svg_session.data
+        # 与直接渲染、PNG输入的缓存键区分开
+        key = f"supersample:{render_size}:{svg_session.source_hash}"
+        self.source_hash = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        self._render = render
+        self._image = None
+        self._pyramid = None
+        self._failed = False
+    
+    @property
+    def image(self):
+        if self._failed:
+            raise RenderFailed(f"超采样渲染SVG失败 ({self.size[0]}px)")
+        if self._image is None:
+            image = self._render(self.size[0])
+            if image is None:
+                self._failed = True
+                raise RenderFailed(f"超采样渲染SVG失败 ({self.size[0]}px)")
+            self._image = image
+            self._pyramid = [image.convert('RGBa')]
+        return self._image
 
 class SVGIconConverter:
-    def __init__(self):
-        self.input_dir = Path("input")
-        self.output_dir = Path("output")
-        
-        # 前端开发常用的图标尺寸
-        self.png_sizes = [16, 32, 48, 64, 96, 128, 192, 256, 512]
-        
-        # ICO文件包含的尺寸 (常用于favicon)
-        self.ico_sizes = [16, 32, 48]
-        
-        # 特殊用途的图标
-        self.special_icons = {
-            'apple-touch-icon.png': 180,
-            'android-chrome-192x192.png': 192,
-            'android-chrome-512x512.png': 512,
-            'mstile-150x150.png': 150,
-        }
+    def __init__(self, input_dir="input", output_dir="output", profile='web', profiles=None):
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        if os.path.realpath(self.input_dir) == os.path.realpath(self.output_dir):
+            raise ValueError(f"输出目录不能与输入目录相同: {self.output_dir}")
+        
+        # 要生成的图标尺寸和文件名，见 profiles.SIZE_PROFILES
+        self.apply_profile(profile, profiles)
+        
+        # 不超过该尺寸的ICO帧写为BMP条目 (0 表示全部使用PNG条目)
+        self.ico_bmp_max_size = 0
+        
+        # 小尺寸图标的锐化参数
+        self.sharpen_max_size = 32
+        self.sharpen_options = {'radius': 0.5, 'percent': 150, 'threshold': 0}
+        
+        # SVG渲染策略: 'direct' 每个尺寸单独渲染；'supersample' 对复杂SVG只在
+        # 最大尺寸×supersample_scale 渲染一次，其余尺寸由降采样生成，简单SVG仍直接渲染
+        self.render_strategy = 'direct'
+        self.supersample_scale = 1
+        self.strategy_stats = {'direct': 0, 'supersample': 0}
+        
+        # 审计报告中估算的渲染开销 {相对路径: 开销}，用于优先处理开销大的文件
+        self.render_costs = None
+        
+        # 渲染结果缓存 (None 表示不使用缓存)
+        self.render_cache = None
+        
+        # 输出方式: 'dir' 每个输入文件一个输出目录，'zip'/'tar' 每个输入文件一个归档；
+        # single_archive=True 时整个批次写入同一个归档 (BATCH_ARCHIVE_NAME)
+        self.output_format = 'dir'
+        self.single_archive = False
+        self.batch_archive = None
+        
+        # PNG编码参数
+        self.set_encoder_preset('balanced')
+        
+        # PNG编码线程数 (>1 时编码与渲染并行进行)
+        self.encode_threads = 1
+        self.encode_stats = new_encode_stats()
+        
+        # 分阶段计时 (None 表示不记录)，以及需要用cProfile分析的输入文件名
+        self.metrics = None
+        self.profile_target = None
+        self._file_metrics = None
+        
+        # 单个文件的处理时间上限 (秒) 和工作进程的内存上限 (字节)，None 表示不限制。
+        # 设置后每个文件都在隔离的工作进程中处理，超出上限的文件被跳过
+        self.file_timeout = None
+        self.file_memory_limit = None
+        self.skipped_files = []
+        
+        # 监视模式下用于取消正在进行的转换，返回True时中止当前文件
+        self.cancel_check = None
+        
+        # 单个文件转换过程中的输出 (进度和错误)，库接口中替换为收集消息的函数
+        self.log = print
+    
+    def apply_profile(self, profile, profiles=None):
+        """选择要生成的图标：配置名 (如 'web')、配置名列表或配置字典，profiles 为额外的自定义配置"""
+        config = resolve_profile(profile, profiles)
+        self.profile_names = config['names']
+        # 通用尺寸 icon-{size}x{size}.png
+        self.png_sizes = config['png_sizes']
+        # ICO文件包含的尺寸 (常用于favicon，最大256)
+        self.ico_sizes = config['ico_sizes']
+        # 特殊用途的图标 {文件名: 尺寸}
+        self.special_icons = config['special_icons']
+        # 带安全边距的图标 {文件名: [画布尺寸, 内容尺寸]} (如maskable图标、Android自适应图标前景)
+        self.padded_icons = config['padded_icons']
+        # 单独的favicon.png的尺寸 (None 表示不生成)
+        self.favicon_size = config['favicon_size']
+        
+    def set_encoder_preset(self, preset):
+        """选择PNG编码预设: fast / balanced / max"""
+        options = PNG_ENCODER_PRESETS[preset]
+        self.encoder_preset = preset
+        self.png_save_options = dict(options['save_options'])
+        self.png_quantize = options['quantize']
+        
+    def __getstate__(self):
+        # 单一归档的文件句柄只在主进程中使用，不传给工作进程
+        state = self.__dict__.copy()
+        state['batch_archive'] = None
+        # 已完成文件的计时记录随文件数增长，每个任务都传给工作进程会使传输量成平方增长；
+        # 工作进程只需要一个空的记录器
+        if self.metrics is not None:
+            state['metrics'] = ConversionMetrics()
+        # 审计报告的渲染开销 (每个文件一项) 只在主进程中用于排序
+        state['render_costs'] = None
+        return state
+        
+    def _span(self, stage, size=None):
+        """为当前文件计时一个阶段，未启用计时时不做任何事"""
+        if self._file_metrics is None:
+            return nullcontext()
+        return self._file_metrics.span(stage, size)
+    
+    def _count(self, name):
+        if self._file_metrics is not None:
+            self._file_metrics.count(name)
         
     def ensure_directories(self):
         """确保输入输出目录存在"""
         self.input_dir.mkdir(exist_ok=True)
         self.output_dir.mkdir(exist_ok=True)
         
-    def svg_to_png(self, svg_path, size):
-        """将SVG转换为指定尺寸的PNG - 优化版本"""
+    def svg_to_png(self, svg_path, size, session=None):
+        """将SVG转换为指定尺寸的PNG - 优化版本
+        
+        传入session时复用已解析的文档树，避免每个尺寸重复读取和解析
+        """
+        from PIL import Image
         try:
             # 使用更高的DPI和更好的渲染选项
             dpi = max(72, size * 2)  # 动态调整DPI，小图标使用更高DPI
             
-            # 使用cairosvg将SVG转换为PNG字节流，使用优化参数
-            png_data = cairosvg.svg2png(
-                url=str(svg_path),
-                output_width=size,
-                output_height=size,
-                dpi=dpi,
-                background_color=None,  # 保持透明背景
-            )
+            if session is None:
+                with self._span('read'):
+                    session = SVGRenderSession(svg_path)
             
-            # 使用PIL加载PNG数据
-            image = Image.open(BytesIO(png_data))
+            sharpen = self._sharpen_options_for(size)
+            cache_key = None
+            if self.render_cache:
+                cache_key = self.render_cache.key('svg', session.source_hash, size, dpi, sharpen)
+                image = self.render_cache.get(cache_key)
+                if image:
+                    self._count('cache_hits')
+                    return image
+                self._count('cache_misses')
             
-            # 确保是RGBA模式以保持透明度
-            if image.mode != 'RGBA':
-                image = image.convert('RGBA')
+            with self._span('parse'):
+                session.tree
             
-            # 对小尺寸图标进行锐化处理
-            if size <= 32:
-                from PIL import ImageFilter
-                # 轻微锐化，保持细节
-                image = image.filter(ImageFilter.UnsharpMask(radius=0.5, percent=150, threshold=0))
+            with self._span('rasterize', size):
+                png_data = session.render(size, dpi)
+                
+                # 使用PIL加载PNG数据
+                image = Image.open(BytesIO(png_data))
+                
+                # 确保是RGBA模式以保持透明度
+                if image.mode != 'RGBA':
+                    image = image.convert('RGBA')
+                image.load()
             
             # 确保图像尺寸准确
             if image.size != (size, size):
-                # 使用高质量重采样
-                image = image.resize((size, size), Image.Resampling.LANCZOS)
+                # 使用高质量重采样，在预乘透明度空间中缩放避免边缘色晕
+                with self._span('resize', size):
+                    image = image.convert('RGBa').resize((size, size), Image.Resampling.LANCZOS).convert('RGBA')
+            
+            # 对小尺寸图标进行锐化处理
+            if sharpen:
+                # 轻微锐化，保持细节
+                with self._span('sharpen', size):
+                    image = unsharp_mask_premultiplied(image, **sharpen)
+            
+            if cache_key:
+                self.render_cache.put(cache_key, image)
                 
             return image
             
         except Exception as e:
-            print(f"转换SVG失败 {svg_path} -> {size}px: {e}")
+            self.log(f"转换SVG失败 {svg_path} -> {size}px: {str(e) or type(e).__name__}")
+            self._count('render_failures')
             return None
     
-    def png_to_resized_png(self, png_path, size):
-        """将PNG转换为指定尺寸的PNG - 优化版本"""
+    def _sharpen_options_for(self, size):
+        """返回该尺寸的锐化参数，不需要锐化时返回None"""
+        if size <= self.sharpen_max_size:
+            return self.sharpen_options
+        return None
+    
+    def png_to_resized_png(self, png_path, size, session=None):
+        """将PNG转换为指定尺寸的PNG - 优化版本
+        
+        传入session时复用已解码的图像和降采样金字塔，避免每个尺寸重复解码
+        """
         try:
-            # 加载原始PNG文件
-            with Image.open(png_path) as original_image:
-                # 确保是RGBA模式以保持透明度
-                if original_image.mode != 'RGBA':
-                    image = original_image.convert('RGBA')
-                else:
-                    image = original_image.copy()
-                
-                # 如果原始尺寸已经是目标尺寸，直接返回副本
-                if image.size == (size, size):
+            if session is None:
+                with self._span('read'):
+                    session = PNGRenderSession(png_path)
+            
+            # 原始尺寸已经是目标尺寸时不做锐化
+            sharpen = self._sharpen_options_for(size) if session.size != (size, size) else None
+            cache_key = None
+            if self.render_cache:
+                cache_key = self.render_cache.key('png', session.source_hash, size, None, sharpen)
+                image = self.render_cache.get(cache_key)
+                if image:
+                    self._count('cache_hits')
                     return image
-                
-                # 使用高质量重采样调整尺寸
-                image = image.resize((size, size), Image.Resampling.LANCZOS)
-                
-                # 对小尺寸图标进行锐化处理
-                if size <= 32:
-                    from PIL import ImageFilter
-                    # 轻微锐化，保持细节
-                    image = image.filter(ImageFilter.UnsharpMask(radius=0.5, percent=150, threshold=0))
-                
-                return image
-                
+                self._count('cache_misses')
+            
+            with self._span(session.decode_stage) if session.decode_stage else nullcontext():
+                session.image
+            
+            with self._span('resize', size):
+                image = session.resize(size)
+            
+            # 对小尺寸图标进行锐化处理
+            if sharpen:
+                # 轻微锐化，保持细节
+                with self._span('sharpen', size):
+                    image = unsharp_mask_premultiplied(image, **sharpen)
+            
+            if cache_key:
+                self.render_cache.put(cache_key, image)
+            
+            return image
+        
+        except RenderFailed:
+            # 源图像无法渲染时其余尺寸也无法生成，整个文件按失败处理
+            raise
         except Exception as e:
-            print(f"转换PNG失败 {png_path} -> {size}px: {e}")
+            self.log(f"转换PNG失败 {png_path} -> {size}px: {str(e) or type(e).__name__}")
+            self._count('render_failures')
             return None
     
     def create_ico(self, images):
-        """创建包含多个尺寸的ICO文件"""
+        """创建包含多个尺寸的ICO文件，返回ICO字节流"""
         if not images:
             return None
-            
-        # 按尺寸排序
-        sorted_images = sorted(images, key=lambda x: x.size[0])
         
-        # 创建ICO文件
         ico_buffer = BytesIO()
         try:
-            # 使用第一个图像作为基础，添加所有尺寸
-            sorted_images[0].save(
-                ico_buffer,
-                format='ICO',
-                sizes=[(img.size[0], img.size[1]) for img in sorted_images],
-                # 添加质量选项
-                optimize=True
-            )
-            ico_buffer.seek(0)
+            write_ico(images, ico_buffer, self.ico_bmp_max_size, self.png_save_options)
             return ico_buffer.getvalue()
         except Exception as e:
             print(f"创建ICO文件失败: {e}")
             return None
     
+    def save_ico(self, images, name, writer):
+        """将已渲染的各尺寸帧写为ICO文件
+        
+        输出到目录时直接写入文件，不在内存中拼接整个ICO；归档和内存输出由写入器缓冲
+        """
+        try:
+            with self._span('ico'), writer.open(name) as f:
+                write_ico(images, f, self.ico_bmp_max_size, self.png_save_options)
+            return True
+        except Exception as e:
+            self.log(f"创建ICO文件失败: {e}")
+            self._count('ico_failures')
+            return False
+    
     def save_png_optimized(self, image, path):
         """优化PNG保存，保持最佳质量"""
+        from sinks import FileWriter
+        path = Path(path)
+        return self._finish_encode(self._encode_png(image, path.name, FileWriter(path.parent)), path)
+    
+    def _encode_png(self, image, name, writer):
+        """按当前编码预设编码PNG并交给输出写入器，可在编码线程中调用，返回编码结果"""
+        start = time.perf_counter()
         try:
-            # 使用优化选项保存PNG
-            image.save(
-                path, 
-                "PNG", 
-                optimize=True,
-                compress_level=6,  # 平衡文件大小和质量
-                pnginfo=None  # 不保存元数据，减小文件大小
-            )
-            return True
+            size = image.size[0]
+            raw_bytes = image.size[0] * image.size[1] * 4
+            with self._span('encode', size):
+                if self.png_quantize:
+                    image = quantize_lossless(image) or image
+                # 使用优化选项保存PNG
+                buffer = BytesIO()
+                image.save(
+                    buffer, 
+                    "PNG", 
+                    pnginfo=None,  # 不保存元数据，减小文件大小
+                    **self.png_save_options
+                )
+            with self._span('write', size):
+                data = buffer.getvalue()
+                writer.write(name, data)
+            return {
+                'error': None,
+                'raw_bytes': raw_bytes,
+                'bytes': len(data),
+                'seconds': time.perf_counter() - start,
+            }
         except Exception as e:
-            print(f"保存PNG失败 {path}: {e}")
+            return {'error': e}
+    
+    def _finish_encode(self, result, name):
+        """在主线程中汇总编码统计并报告错误"""
+        if result['error'] is not None:
+            self.log(f"保存PNG失败 {name}: {result['error']}")
+            self._count('encode_failures')
             return False
+        self.encode_stats['files'] += 1
+        self.encode_stats['raw_bytes'] += result['raw_bytes']
+        self.encode_stats['bytes'] += result['bytes']
+        self.encode_stats['seconds'] += result['seconds']
+        return True
     
-    def process_svg_file(self, svg_path):
-        """处理单个SVG文件"""
-        filename_base = svg_path.stem
-        print(f"\n处理SVG文件: {svg_path.name}")
+    def build_render_plan(self):
+        """构建渲染计划：汇总所有输出组的目标
         
-        # 创建子目录
-        output_subdir = self.output_dir / filename_base
-        output_subdir.mkdir(exist_ok=True)
+        返回 (group, filename, size) 列表，保持各输出组原有顺序，带安全边距的图标的size为内容尺寸。
+        执行时每个唯一尺寸只渲染一次，再分发给所有需要该尺寸的文件
+        """
+        plan = [('png', f"icon-{size}x{size}.png", size) for size in self.png_sizes]
+        plan += [('special', name, size) for name, size in self.special_icons.items()]
+        plan += [('padded', name, content) for name, (_, content) in self.padded_icons.items()]
+        plan += [('ico', "favicon.ico", size) for size in self.ico_sizes]
+        # 单独的favicon.png (默认32x32)
+        if self.favicon_size:
+            plan.append(('favicon', "favicon.png", self.favicon_size))
+        # 组合多个尺寸配置时，同名文件只生成一次
+        seen = set()
+        unique = []
+        for group, name, size in plan:
+            if group == 'ico' or name not in seen:
+                seen.add(name)
+                unique.append((group, name, size))
+        return unique
+    
+    def output_names(self):
+        """每个输入文件生成的所有文件名"""
+        return list(dict.fromkeys(name for _, name, _ in self.build_render_plan()))
+    
+    def plan_sizes(self, plan):
+        """渲染计划中需要渲染的唯一尺寸（升序）"""
+        return sorted({size for _, _, size in plan})
+    
+    def execute_render_plan(self, plan, render, writer):
+        """执行渲染计划：每个唯一尺寸调用一次render(size)，再把所有目标文件交给输出写入器
         
-        # 生成标准PNG尺寸
-        print("生成PNG文件...")
-        for size in self.png_sizes:
-            image = self.svg_to_png(svg_path, size)
-            if image:
-                png_path = output_subdir / f"icon-{size}x{size}.png"
-                if self.save_png_optimized(image, png_path):
-                    print(f"  ✓ {png_path.name}")
+        encode_threads > 1 时，每个尺寸渲染完成后立即提交到编码线程池，
+        PNG编码与后续尺寸的渲染并行进行
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        images = {}
+        encoding = {}
+        encoder = ThreadPoolExecutor(self.encode_threads) if self.encode_threads > 1 else None
+        try:
+            for size in self.plan_sizes(plan):
+                if self.cancel_check is not None and self.cancel_check():
+                    raise ConversionCancelled()
+                images[size] = render(size)
+                if encoder and images[size]:
+                    for group, name, target_size in plan:
+                        if target_size == size and group != 'ico':
+                            encoding[name] = encoder.submit(
+                                self._encode_png, self._target_image(group, name, images[size]), name, writer)
+            
+            def targets(group):
+                return [target for target in plan if target[0] == group]
+            
+            # 生成标准PNG尺寸
+            if targets('png'):
+                self.log("生成PNG文件...")
+                self._save_plan_pngs(targets('png'), images, writer, encoding)
+            
+            # 生成特殊用途图标
+            if targets('special'):
+                self.log("生成特殊用途图标...")
+                self._save_plan_pngs(targets('special'), images, writer, encoding)
+            
+            # 生成带安全边距的图标
+            if targets('padded'):
+                self.log("生成带安全边距的图标...")
+                self._save_plan_pngs(targets('padded'), images, writer, encoding)
+            
+            # 生成ICO文件
+            if targets('ico'):
+                self.log("生成ICO文件...")
+            ico_images = [images[size] for _, _, size in targets('ico') if images[size]]
+            if ico_images:
+                if self.save_ico(ico_images, "favicon.ico", writer):
+                    self.log(f"  ✓ favicon.ico")
                 else:
-                    print(f"  ❌ {png_path.name}")
-        
-        # 生成特殊用途图标
-        print("生成特殊用途图标...")
-        for special_name, size in self.special_icons.items():
-            image = self.svg_to_png(svg_path, size)
+                    self.log(f"  ❌ favicon.ico")
+            
+            # 生成单独的favicon.png
+            self._save_plan_pngs(targets('favicon'), images, writer, encoding)
+        finally:
+            if encoder:
+                encoder.shutdown()
+    
+    def _save_plan_pngs(self, targets, images, writer, encoding):
+        """保存渲染计划中的PNG目标，已提交到编码线程的目标等待其完成"""
+        for group, name, size in targets:
+            image = images[size]
             if image:
-                special_path = output_subdir / special_name
-                if self.save_png_optimized(image, special_path):
-                    print(f"  ✓ {special_name}")
+                if name in encoding:
+                    result = encoding[name].result()
                 else:
-                    print(f"  ❌ {special_name}")
-        
-        # 生成ICO文件
-        print("生成ICO文件...")
-        ico_images = []
-        for size in self.ico_sizes:
-            image = self.svg_to_png(svg_path, size)
-            if image:
-                ico_images.append(image)
+                    result = self._encode_png(self._target_image(group, name, image), name, writer)
+                if self._finish_encode(result, name):
+                    self.log(f"  ✓ {name}")
+                else:
+                    self.log(f"  ❌ {name}")
+    
+    def _target_image(self, group, name, image):
+        """目标文件的最终图像：带安全边距的图标把渲染好的内容居中放在透明画布上"""
+        if group != 'padded':
+            return image
+        from PIL import Image
+        canvas_size = self.padded_icons[name][0]
+        canvas = Image.new('RGBA', (canvas_size, canvas_size), (0, 0, 0, 0))
+        offset = (canvas_size - image.size[0]) // 2
+        canvas.paste(image, (offset, offset))
+        return canvas
+    
+    def output_subdir_for(self, path):
+        """输入文件的输出目录：保持与输入目录相同的层级，如 input/a/logo.svg -> output/a/logo/"""
+        try:
+            relative = path.relative_to(self.input_dir)
+        except ValueError:
+            relative = Path(path.name)
+        return self.output_dir / relative.parent / path.stem
+    
+    def _display_name(self, path):
+        try:
+            return path.relative_to(self.input_dir).as_posix()
+        except ValueError:
+            return path.name
+    
+    def iter_input_files(self):
+        """递归查找输入目录中的SVG和PNG文件，边扫描边产出 (kind, path)
         
-        if ico_images:
-            ico_data = self.create_ico(ico_images)
-            if ico_data:
-                ico_path = output_subdir / "favicon.ico"
+        同一目录内按文件名排序，跳过以 . 开头的隐藏文件和目录；
+        输出目录位于输入目录内时跳过输出目录，避免把生成的图标当作输入
+        """
+        output_dir = os.path.realpath(self.output_dir)
+        stack = [self.input_dir]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
                 try:
-                    with open(ico_path, 'wb') as f:
-                        f.write(ico_data)
-                    print(f"  ✓ favicon.ico")
-                except Exception as e:
-                    print(f"  ❌ favicon.ico: {e}")
-        
-        # 生成单独的favicon.png (32x32)
-        favicon_png = self.svg_to_png(svg_path, 32)
-        if favicon_png:
-            favicon_png_path = output_subdir / "favicon.png"
-            if self.save_png_optimized(favicon_png, favicon_png_path):
-                print(f"  ✓ favicon.png")
-            else:
-                print(f"  ❌ favicon.png")
+                    if entry.is_dir():
+                        if os.path.realpath(entry.path) != output_dir:
+                            subdirs.append(Path(entry.path))
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                suffix = os.path.splitext(entry.name)[1].lower()
+                if suffix in ('.svg', '.png'):
+                    yield suffix[1:], Path(entry.path)
+            # 倒序入栈，使子目录按名称顺序处理
+            stack.extend(reversed(subdirs))
     
-    def process_png_file(self, png_path):
-        """处理单个PNG文件"""
-        filename_base = png_path.stem
-        print(f"\n处理PNG文件: {png_path.name}")
+    def open_output(self, path):
+        """输入文件的输出写入器
         
-        # 创建子目录
-        output_subdir = self.output_dir / filename_base
-        output_subdir.mkdir(exist_ok=True)
+        dir: 输出目录 (先写临时目录再整体替换)；zip/tar: 每个输入文件一个归档；
+        single_archive: 写入整个批次共用的归档，条目名为 "子目录/文件名"
+        """
+        from sinks import ArchiveWriter, DirectoryWriter
+        if self.single_archive:
+            if self.batch_archive is None:
+                raise RuntimeError("单一归档模式只能通过 convert_all 使用")
+            subdir = self.output_subdir_for(path)
+            return self.batch_archive.open_set(subdir.relative_to(self.output_dir).as_posix())
+        if self.output_format == 'dir':
+            return DirectoryWriter(self.output_path_for(path))
+        return ArchiveWriter(self.output_path_for(path), self.output_format)
+    
+    def output_path_for(self, path):
+        """输入文件的输出目录，或zip/tar输出方式下的归档路径"""
+        subdir = self.output_subdir_for(path)
+        if self.output_format == 'dir':
+            return subdir
+        return subdir.with_name(f"{subdir.name}.{self.output_format}")
+    
+    def convert_to_bundle(self, kind, path, data=None):
+        """转换单个文件，返回内存中的输出 {文件名: 字节}，不读写输出目录
         
-        # 生成标准PNG尺寸
-        print("生成PNG文件...")
-        for size in self.png_sizes:
-            image = self.png_to_resized_png(png_path, size)
-            if image:
-                png_output_path = output_subdir / f"icon-{size}x{size}.png"
-                if self.save_png_optimized(image, png_output_path):
-                    print(f"  ✓ {png_output_path.name}")
-                else:
-                    print(f"  ❌ {png_output_path.name}")
+        data为源文件内容，None时从path读取；path用于显示文件名和解析SVG中的相对引用
+        """
+        from sinks import MemoryWriter
+        writer = MemoryWriter()
+        if kind == 'svg':
+            self.process_svg_file(Path(path), writer, data)
+        else:
+            self.process_png_file(Path(path), writer, data)
+        return writer.files
+    
+    def process_svg_file(self, svg_path, writer=None, data=None):
+        """处理单个SVG文件
         
-        # 生成特殊用途图标
-        print("生成特殊用途图标...")
-        for special_name, size in self.special_icons.items():
-            image = self.png_to_resized_png(png_path, size)
-            if image:
-                special_path = output_subdir / special_name
-                if self.save_png_optimized(image, special_path):
-                    print(f"  ✓ {special_name}")
-                else:
-                    print(f"  ❌ {special_name}")
+        writer为None时按输出格式写入输出目录；data为内存中的SVG内容，None时从svg_path读取
+        """
+        self.log(f"\n处理SVG文件: {self._display_name(svg_path)}")
         
-        # 生成ICO文件
-        print("生成ICO文件...")
-        ico_images = []
-        for size in self.ico_sizes:
-            image = self.png_to_resized_png(png_path, size)
-            if image:
-                ico_images.append(image)
+        # 只解析一次SVG，所有尺寸复用同一文档树
+        with self._span('read'):
+            session = SVGRenderSession(svg_path, data)
+        
+        plan = self.build_render_plan()
+        strategy = self.choose_render_strategy(svg_path, session.data)
+        self.strategy_stats[strategy] += 1
+        self._count(f'strategy_{strategy}')
+        if strategy == 'supersample':
+            render_size = max(self.plan_sizes(plan)) * self.supersample_scale
+            self.log(f"渲染策略: 超采样 (复杂SVG，渲染一次 {render_size}px 后降采样)")
+            source = SupersampleRenderSession(
+                session, render_size, lambda size: self.svg_to_png(svg_path, size, session))
+            render = lambda size: self.png_to_resized_png(svg_path, size, source)
+        else:
+            if self.render_strategy != 'direct':
+                self.log("渲染策略: 直接渲染 (简单SVG)")
+            render = lambda size: self.svg_to_png(svg_path, size, session)
+        with writer or self.open_output(svg_path) as output:
+            self.execute_render_plan(plan, render, output)
+    
+    def choose_render_strategy(self, svg_path, data=None):
+        """为SVG文件选择渲染策略：只有supersample模式下的复杂SVG使用超采样"""
+        if self.render_strategy != 'supersample':
+            return 'direct'
+        from quality_check import SVGQualityChecker
+        checker = SVGQualityChecker()
+        with self._span('parse'):
+            analysis = checker.analyze_svg(svg_path, data)
+        return 'supersample' if checker.is_complex(analysis) else 'direct'
+    
+    def process_png_file(self, png_path, writer=None, data=None):
+        """处理单个PNG文件
+        
+        writer为None时按输出格式写入输出目录；data为内存中的PNG内容，None时从png_path读取
+        """
+        self.log(f"\n处理PNG文件: {self._display_name(png_path)}")
+        
+        # 只解码一次PNG，所有尺寸复用同一图像和降采样金字塔
+        with self._span('read'):
+            session = PNGRenderSession(png_path, data)
+        
+        plan = self.build_render_plan()
+        with writer or self.open_output(png_path) as output:
+            self.execute_render_plan(plan, lambda size: self.png_to_resized_png(png_path, size, session), output)
+    
+    def load_audit_report(self, path):
+        """读取 quality_check.py --json 生成的审计报告中的渲染开销估算
+        
+        报告中的文件名是相对审计时输入目录的路径，输入目录与当前不同时给出警告
+        """
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.render_costs = {
+            record['file']: record.get('render_cost') or 0
+            for record in report.get('files', [])
+        }
+        audited_dir = report.get('input_dir')
+        if audited_dir and Path(audited_dir).resolve() != self.input_dir.resolve():
+            print(f"⚠️ 审计报告的输入目录 {audited_dir} 与当前输入目录 {self.input_dir} 不同，"
+                  f"请使用 quality_check.py --input-dir {self.input_dir} 重新生成报告")
+    
+    def config_hash(self):
+        """尺寸、特殊图标和编码配置的哈希，配置变化时所有输入都需重新生成"""
+        config = {
+            'version': MANIFEST_VERSION,
+            'png_sizes': self.png_sizes,
+            'ico_sizes': self.ico_sizes,
+            'special_icons': self.special_icons,
+            'padded_icons': self.padded_icons,
+            'favicon_size': self.favicon_size,
+            'png_save_options': self.png_save_options,
+            'png_quantize': self.png_quantize,
+            'ico_bmp_max_size': self.ico_bmp_max_size,
+            'sharpen_max_size': self.sharpen_max_size,
+            'sharpen_options': self.sharpen_options,
+            'render_strategy': self.render_strategy,
+            'supersample_scale': self.supersample_scale,
+            'output_format': self.output_format,
+            'single_archive': self.single_archive,
+        }
+        data = json.dumps(config, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+    
+    def expected_outputs(self, path):
+        """输入文件应生成的所有输出 (相对输出目录的路径，单一归档模式下为归档中的条目名)"""
+        subdir = self.output_subdir_for(path).relative_to(self.output_dir).as_posix()
+        if self.output_format != 'dir' and not self.single_archive:
+            return [f"{subdir}.{self.output_format}"]
+        return [f"{subdir}/{name}" for name in self.output_names()]
+    
+    def load_manifest(self):
+        """读取构建清单，不存在或损坏时返回空清单"""
+        manifest_path = self.output_dir / MANIFEST_NAME
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'inputs': {}}
+    
+    def save_manifest(self, manifest):
+        """原子写入构建清单"""
+        manifest_path = self.output_dir / MANIFEST_NAME
+        tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+    
+    def _update_manifest_entry(self, manifest, path, file_hash, config_hash):
+        """记录输入文件的输出；输出不完整时删除记录，使其下次重新生成"""
+        key = path.relative_to(self.input_dir).as_posix()
+        outputs = self.expected_outputs(path)
+        if self._outputs_present(outputs):
+            previous = manifest['inputs'].get(key)
+            if previous:
+                # 输出方式改变后 (如目录改为归档)，之前生成的文件不再被清单记录，在这里删除；
+                # 单一归档模式下的输出都在归档中，磁盘上记录的旧输出全部删除
+                on_disk = () if self.batch_archive is not None else outputs
+                self._remove_outputs(previous.get('outputs', []), on_disk)
+            manifest['inputs'][key] = {
+                'hash': file_hash,
+                'config': config_hash,
+                'outputs': outputs,
+            }
+        else:
+            manifest['inputs'].pop(key, None)
+    
+    def _outputs_present(self, outputs):
+        if self.batch_archive is not None:
+            return all(self.batch_archive.contains(name) for name in outputs)
+        return all((self.output_dir / name).is_file() for name in outputs)
+    
+    def _reuse_outputs(self, outputs):
+        """未变化的输入能否沿用已有输出；单一归档模式下从上一次的归档复制其条目"""
+        if self.batch_archive is not None:
+            return self.batch_archive.carry_over(outputs)
+        return self._outputs_present(outputs)
+    
+    def _prune_outputs(self, manifest, current_keys):
+        """删除已不存在的输入文件生成的输出
         
-        if ico_images:
-            ico_data = self.create_ico(ico_images)
-            if ico_data:
-                ico_path = output_subdir / "favicon.ico"
+        单一归档模式下已删除输入的条目不会复制到新归档。清单记录的输出可能是之前以其他
+        输出方式 (目录、zip/tar) 运行时生成的文件，无论当前的输出方式如何，磁盘上存在的都一并删除
+        """
+        # 仍被现有输入使用的输出不做清理 (如同名的SVG和PNG)
+        live_outputs = {name
+                        for key in current_keys
+                        for name in manifest['inputs'].get(key, {}).get('outputs', [])}
+        for key in sorted(set(manifest['inputs']) - set(current_keys)):
+            outputs = manifest['inputs'].pop(key).get('outputs', [])
+            removed = self._remove_outputs(outputs, live_outputs)
+            if self.single_archive and removed < len(outputs):
+                print(f"🗑️ 已从归档中移除 {key} 的 {len(outputs) - removed} 个输出文件")
+            if removed or not self.single_archive:
+                print(f"🗑️ 已清理 {key} 的 {removed} 个输出文件")
+    
+    def _remove_outputs(self, names, keep=()):
+        """删除磁盘上存在的输出文件 (keep中的除外) 和随之变空的输出目录，返回删除的文件数"""
+        removed = 0
+        for name in names:
+            if name in keep:
+                continue
+            output_path = self.output_dir / name
+            # 单一归档本身可能与旧的归档输出同名 (如 input/icons.svg 生成的 icons.zip)
+            if self.batch_archive is not None and output_path == self.batch_archive.path:
+                continue
+            if output_path.is_file():
+                output_path.unlink()
+                removed += 1
+        for output_dir in {Path(name).parent for name in names}:
+            # 删除空的输出目录及其空的上级目录
+            while output_dir != Path('.'):
                 try:
-                    with open(ico_path, 'wb') as f:
-                        f.write(ico_data)
-                    print(f"  ✓ favicon.ico")
-                except Exception as e:
-                    print(f"  ❌ favicon.ico: {e}")
-        
-        # 生成单独的favicon.png (32x32)
-        favicon_png = self.png_to_resized_png(png_path, 32)
-        if favicon_png:
-            favicon_png_path = output_subdir / "favicon.png"
-            if self.save_png_optimized(favicon_png, favicon_png_path):
-                print(f"  ✓ favicon.png")
+                    (self.output_dir / output_dir).rmdir()
+                except OSError:
+                    break
+                output_dir = output_dir.parent
+        return removed
+    
+    def process_input_file(self, kind, path):
+        """处理单个输入文件，异常隔离在文件级别"""
+        if self.metrics is not None:
+            self._file_metrics = self.metrics.start_file(path.relative_to(self.input_dir).as_posix(), kind)
+        try:
+            if self.profile_target in (path.name, self._display_name(path)):
+                self._profile_input_file(kind, path)
+            elif kind == 'svg':
+                self.process_svg_file(path)
             else:
-                print(f"  ❌ favicon.png")
+                self.process_png_file(path)
+        except ConversionCancelled:
+            print(f"⏹️ {self._display_name(path)} 在转换过程中被修改，已取消本次转换")
+            self._count('cancelled')
+        except Exception as e:
+            print(f"❌ 处理{kind.upper()}文件 {self._display_name(path)} 时出错: {e}")
+            self._count('file_failures')
+        finally:
+            if self._file_metrics is not None:
+                self.metrics.finish_file(self._file_metrics)
+                self._file_metrics = None
     
-    def convert_all(self):
-        """转换所有SVG和PNG文件"""
+    def _profile_input_file(self, kind, path):
+        """用cProfile分析单个文件的处理过程，结果保存到输出目录"""
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        process = self.process_svg_file if kind == 'svg' else self.process_png_file
+        try:
+            profiler.runcall(process, path)
+        finally:
+            profile_path = self.output_subdir_for(path).with_suffix(".prof")
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_path)
+            print(f"\n🔬 性能分析结果已保存: {profile_path}")
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(15)
+    
+    def convert_all(self, jobs=1, force=False, queue_size=256):
+        """转换所有SVG和PNG文件
+        
+        递归扫描输入目录。扫描在后台线程中进行，并通过有界队列 (queue_size)
+        交给转换流程，扫描尚未结束时转换就已开始。
+        jobs > 1 或设置了单文件时间/内存上限时，每个文件交给隔离的工作进程处理，
+        结果按输入顺序输出。
+        根据输出目录中的构建清单跳过内容和配置都未变化、且输出完整的文件，
+        force=True 时忽略清单全部重新生成。
+        加载了审计报告 (render_costs) 时先收集全部待转换文件，按估算渲染开销从高到低处理。
+        单一归档模式下所有输出写入新的归档，全部完成后才替换旧归档
+        """
         self.ensure_directories()
+        if self.single_archive:
+            from sinks import BatchArchive
+            self.batch_archive = BatchArchive(
+                self.output_dir / f"{BATCH_ARCHIVE_NAME}.{self.output_format}", self.output_format)
+        try:
+            self._convert_batch(jobs, force, queue_size)
+        except BaseException:
+            if self.batch_archive is not None:
+                self.batch_archive.abort()
+            raise
+        finally:
+            self.batch_archive = None
+    
+    def _convert_batch(self, jobs, force, queue_size):
+        
+        # 增量构建：跳过未变化的文件
+        manifest = self.load_manifest()
+        config_hash = self.config_hash()
+        counts = {'svg': 0, 'png': 0, 'skipped': 0}
+        seen_keys = []
+        
+        def pending_work():
+            """在扫描线程中运行：计算内容哈希并过滤掉未变化的文件"""
+            for kind, path in self.iter_input_files():
+                counts[kind] += 1
+                key = path.relative_to(self.input_dir).as_posix()
+                seen_keys.append(key)
+                file_hash = file_sha256(path)
+                entry = manifest['inputs'].get(key)
+                if (not force and entry
+                        and entry.get('hash') == file_hash
+                        and entry.get('config') == config_hash
+                        and self._reuse_outputs(entry.get('outputs', []))):
+                    counts['skipped'] += 1
+                    continue
+                yield kind, path, file_hash
         
-        # 查找所有SVG和PNG文件
-        svg_files = list(self.input_dir.glob("*.svg"))
-        png_files = list(self.input_dir.glob("*.png"))
+        def finished(kind, path, file_hash):
+            # 更新构建清单：只记录输出完整的文件，失败的文件下次重新生成
+            self._update_manifest_entry(manifest, path, file_hash, config_hash)
         
-        total_files = len(svg_files) + len(png_files)
+        self.skipped_files = []
+        work = _stream_in_background(pending_work(), queue_size)
+        if self.render_costs:
+            # 按审计报告估算的渲染开销从高到低处理，避免最后只剩一个大文件在转换
+            work = sorted(work, key=lambda item: -self.render_costs.get(
+                item[1].relative_to(self.input_dir).as_posix(), 0))
+            matched = sum(1 for _, path, _ in work
+                          if path.relative_to(self.input_dir).as_posix() in self.render_costs)
+            if work and not matched:
+                print(f"⚠️ {len(work)} 个待转换文件都不在审计报告中，按扫描顺序转换")
+            elif work:
+                print(f"按审计报告的渲染开销排序 {len(work)} 个待转换文件 (报告中有 {matched} 个)")
+        if jobs > 1 or self.file_timeout or self.file_memory_limit:
+            self._convert_parallel(work, jobs, finished)
+        else:
+            for kind, path, file_hash in work:
+                self.process_input_file(kind, path)
+                finished(kind, path, file_hash)
         
-        if total_files == 0:
+        if counts['svg'] + counts['png'] == 0:
+            # 最后一个输入被删除时仍需清理其输出；从未转换过时不创建清单和空归档
+            if manifest['inputs']:
+                self._finish_outputs(manifest, seen_keys)
+            elif self.batch_archive is not None:
+                self.batch_archive.abort()
             print("❌ 在input目录中没有找到SVG或PNG文件")
             print(f"请将SVG或PNG文件放入: {self.input_dir.absolute()}")
             return
         
-        print(f"找到 {len(svg_files)} 个SVG文件和 {len(png_files)} 个PNG文件")
-        print("=" * 50)
+        print("\n" + "=" * 50)
+        print(f"找到 {counts['svg']} 个SVG文件和 {counts['png']} 个PNG文件")
+        if counts['skipped']:
+            print(f"⏭️ 跳过 {counts['skipped']} 个未变化的文件")
         
-        # 处理SVG文件
-        for svg_file in svg_files:
-            try:
-                self.process_svg_file(svg_file)
-            except Exception as e:
-                print(f"❌ 处理SVG文件 {svg_file.name} 时出错: {e}")
+        self._finish_outputs(manifest, seen_keys)
         
-        # 处理PNG文件
-        for png_file in png_files:
-            try:
-                self.process_png_file(png_file)
-            except Exception as e:
-                print(f"❌ 处理PNG文件 {png_file.name} 时出错: {e}")
+        self.show_encode_report()
+        self.show_strategy_report()
+        self.show_skipped_report()
+        self.show_metrics_report()
+        
+        if self.render_cache:
+            removed = self.render_cache.prune()
+            if removed:
+                print(f"🧹 渲染缓存已清理 {removed} 个最久未使用的条目")
         
         print("\n" + "=" * 50)
         print("✅ 转换完成！")
         print(f"输出目录: {self.output_dir.absolute()}")
         
         # 显示输出文件说明
-        self.show_output_guide()
+        if 'web' in self.profile_names:
+            self.show_output_guide()
+        else:
+            print(f"\n📋 尺寸配置: {', '.join(self.profile_names)} (每个输入文件生成 {len(self.output_names())} 个文件)")
         
         # 显示质量优化说明
         self.show_quality_tips()
     
+    def _finish_outputs(self, manifest, current_keys):
+        """清理已删除输入的输出，提交单一归档并保存构建清单"""
+        self._prune_outputs(manifest, current_keys)
+        if self.batch_archive is not None:
+            # 归档先于清单提交，清单记录的条目一定已在归档中
+            self.batch_archive.commit()
+            print(f"🗃️ 已写入归档: {self.batch_archive.path} ({len(self.batch_archive.names)} 个文件)")
+        self.save_manifest(manifest)
+    
+    def _convert_parallel(self, work, jobs, finished):
+        """在隔离的工作进程中处理文件，按输入顺序收集并打印每个文件的输出
+        
+        同时在处理中的文件数不超过 jobs*2，work 可以是边扫描边产出的迭代器。
+        超过 file_timeout 或超出 file_memory_limit 的文件所在工作进程会被终止并重启，
+        该文件记为跳过，不影响其他文件
+        """
+        from collections import deque
+        from workers import IsolatedProcessPool, WorkerCrashed, WorkerTimeout
+        if jobs > 1:
+            print(f"使用 {jobs} 个并行进程")
+        if self.file_timeout or self.file_memory_limit:
+            limits = []
+            if self.file_timeout:
+                limits.append(f"超时 {self.file_timeout:g}s")
+            if self.file_memory_limit:
+                limits.append(f"内存 {format_bytes(self.file_memory_limit)}")
+            print(f"单个文件的处理上限: {', '.join(limits)}")
+        
+        def collect(kind, path, file_hash, future):
+            try:
+                output, encode_stats, strategy_stats, records, bundles = future.result()
+            except WorkerTimeout as e:
+                self._skip_file(kind, path, f"处理时间{e}，已终止")
+                return
+            except WorkerCrashed as e:
+                self._skip_file(kind, path, f"工作进程异常退出 ({e})，可能超出内存上限")
+                return
+            except Exception as e:
+                # 结果无法传回、内存上限下的MemoryError等，只跳过该文件，其余文件继续
+                self._skip_file(kind, path, f"处理失败 ({str(e) or type(e).__name__})")
+                return
+            print(output, end='')
+            for key, value in encode_stats.items():
+                self.encode_stats[key] += value
+            for key, value in strategy_stats.items():
+                self.strategy_stats[key] += value
+            if self.metrics is not None:
+                self.metrics.records.extend(records)
+            for prefix, files in bundles.items():
+                self.batch_archive.write_bundle(prefix, files)
+            finished(kind, path, file_hash)
+        
+        in_flight = deque()
+        with IsolatedProcessPool(jobs, timeout=self.file_timeout, memory_limit=self.file_memory_limit) as pool:
+            for kind, path, file_hash in work:
+                future = pool.submit(_process_input_file_worker, self, kind, path)
+                in_flight.append((kind, path, file_hash, future))
+                if len(in_flight) >= jobs * 2:
+                    collect(*in_flight.popleft())
+            while in_flight:
+                collect(*in_flight.popleft())
+    
+    def _skip_file(self, kind, path, reason):
+        """记录被终止而跳过的文件，下次运行时会重新尝试"""
+        from sinks import remove_partial_outputs
+        print(f"\n⛔ 跳过{kind.upper()}文件 {self._display_name(path)}: {reason}")
+        # 被终止的工作进程来不及清理写了一半的临时输出
+        if not self.single_archive:
+            remove_partial_outputs(self.output_path_for(path))
+        self.skipped_files.append((self._display_name(path), reason))
+        if self.metrics is not None:
+            file_metrics = self.metrics.start_file(path.relative_to(self.input_dir).as_posix(), kind)
+            file_metrics.count('skipped')
+            self.metrics.finish_file(file_metrics)
+    
+    def _scan_inputs(self):
+        """递归扫描输入目录，返回 {路径: (修改时间, 大小)}"""
+        snapshot = {}
+        for _, path in self.iter_input_files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+    
+    def watch(self, interval=0.5, debounce=0.5, jobs=1):
+        """监视输入目录，只重新转换发生变化的文件
+        
+        先进行一次完整的增量转换，然后轮询输入目录。文件变化后等待debounce秒
+        没有新的写入再转换；转换过程中文件再次被修改时取消本次转换，等待下一次。
+        已加载的依赖在整个监视过程中保持常驻
+        """
+        import queue
+        import threading
+        
+        # 在首次转换之前记录快照：转换过程中保存的文件在首次轮询时就会被发现，
+        # 内容实际没有变化的文件由worker中的哈希检查跳过
+        snapshot = self._scan_inputs()
+        self.convert_all(jobs=jobs)
+        print(f"\n👀 正在监视 {self.input_dir.absolute()} (按 Ctrl+C 退出)")
+        
+        config_hash = self.config_hash()
+        work_queue = queue.Queue()
+        lock = threading.Lock()
+        state = {'current': None, 'cancelled': False, 'queued': set()}
+        
+        def worker():
+            while True:
+                item = work_queue.get()
+                if item is None:
+                    return
+                action, path = item
+                manifest = self.load_manifest()
+                if action == 'remove':
+                    keys = [p.relative_to(self.input_dir).as_posix() for p in self._scan_inputs()]
+                    self._prune_outputs(manifest, keys)
+                    self.save_manifest(manifest)
+                    continue
+                
+                with lock:
+                    state['queued'].discard(path)
+                    state['current'] = path
+                    state['cancelled'] = False
+                try:
+                    key = path.relative_to(self.input_dir).as_posix()
+                    try:
+                        file_hash = file_sha256(path)
+                    except OSError:
+                        continue
+                    entry = manifest['inputs'].get(key)
+                    # 内容没有变化 (如只更新了修改时间) 时不需要重新转换
+                    if (entry and entry.get('hash') == file_hash
+                            and entry.get('config') == config_hash
+                            and self._outputs_present(entry.get('outputs', []))):
+                        continue
+                    kind = path.suffix.lower()[1:]
+                    self.cancel_check = lambda: state['cancelled']
+                    start = time.perf_counter()
+                    self.process_input_file(kind, path)
+                    self.cancel_check = None
+                    if not state['cancelled']:
+                        self._update_manifest_entry(manifest, path, file_hash, config_hash)
+                        self.save_manifest(manifest)
+                        if key in manifest['inputs']:
+                            print(f"⏱️ {self._display_name(path)} 用时 {time.perf_counter() - start:.2f}s")
+                finally:
+                    self.cancel_check = None
+                    with lock:
+                        state['current'] = None
+        
+        thread = threading.Thread(target=worker, name="icon-watch-worker", daemon=True)
+        thread.start()
+        
+        changed = {}  # 路径 -> 最后一次检测到变化的时间
+        try:
+            while True:
+                time.sleep(interval)
+                current = self._scan_inputs()
+                now = time.monotonic()
+                
+                for path, stat in current.items():
+                    if snapshot.get(path) != stat:
+                        changed[path] = now
+                        with lock:
+                            if state['current'] == path:
+                                state['cancelled'] = True
+                
+                if set(snapshot) - set(current):
+                    for path in set(snapshot) - set(current):
+                        changed.pop(path, None)
+                        print(f"\n🗑️ {self._display_name(path)} 已删除")
+                    work_queue.put(('remove', None))
+                snapshot = current
+                
+                # 防抖：在debounce时间内没有新的写入才开始转换
+                for path, changed_at in list(changed.items()):
+                    if now - changed_at < debounce:
+                        continue
+                    del changed[path]
+                    with lock:
+                        if path in state['queued']:
+                            continue
+                        state['queued'].add(path)
+                    work_queue.put(('convert', path))
+        except KeyboardInterrupt:
+            print("\n停止监视")
+        finally:
+            with lock:
+                state['cancelled'] = True
+            work_queue.put(None)
+            thread.join()
+    
+    def show_encode_report(self):
+        """显示PNG编码统计"""
+        stats = self.encode_stats
+        if not stats['files']:
+            return
+        saved = stats['raw_bytes'] - stats['bytes']
+        print(f"\n📦 PNG编码 [{self.encoder_preset}]: {stats['files']} 个文件, "
+              f"耗时 {stats['seconds']:.2f}s, "
+              f"{format_bytes(stats['raw_bytes'])} → {format_bytes(stats['bytes'])} "
+              f"(节省 {format_bytes(saved)})")
+    
+    def show_skipped_report(self):
+        """显示因超时或超出内存上限而跳过的文件"""
+        if not self.skipped_files:
+            return
+        print(f"\n⛔ 跳过 {len(self.skipped_files)} 个文件:")
+        for name, reason in self.skipped_files:
+            print(f"  {name}: {reason}")
+    
+    def show_strategy_report(self):
+        """显示各渲染策略处理的SVG文件数"""
+        if self.render_strategy == 'direct' or not any(self.strategy_stats.values()):
+            return
+        print(f"\n🖼️ 渲染策略: 直接渲染 {self.strategy_stats['direct']} 个SVG, "
+              f"超采样 {self.strategy_stats['supersample']} 个SVG")
+    
+    def show_metrics_report(self, count=5):
+        """显示耗时最长的文件及其主要耗时阶段"""
+        if not self.metrics or not self.metrics.records:
+            return
+        files, stages, counters = self.metrics.totals()
+        print("\n⏱️ 阶段耗时:")
+        print("  " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stages.items()))
+        if counters:
+            print("  " + ", ".join(f"{name} {amount}" for name, amount in counters.items()))
+        print(f"⏱️ 耗时最长的 {count} 个文件:")
+        for record in self.metrics.slowest(count):
+            stage, seconds = max(record['stages'].items(), key=lambda item: item[1], default=('-', 0))
+            print(f"  {record['seconds']:.3f}s  {record['file']}  (主要耗时: {stage} {seconds:.3f}s)")
+    
     def show_output_guide(self):
         """显示输出文件使用说明"""
         print("\n📋 文件用途说明:")
@@ -335,13 +1461,262 @@ class SVGIconConverter:
         print("• PNG文件: 建议使用高分辨率的PNG作为输入以获得最佳质量")
         print("• 建议原始文件使用简洁的图形设计，避免过于复杂的效果")
 
-def main():
+def _stream_in_background(iterable, maxsize):
+    """在后台线程中迭代iterable，通过有界队列逐个产出结果
+    
+    队列满时后台线程阻塞等待，消费者处理的同时生产者继续扫描
+    """
+    import queue
+    import threading
+    
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    
+    def put(message):
+        while not stop.is_set():
+            try:
+                items.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put(('item', item)):
+                    return
+        except BaseException as e:
+            put(('error', e))
+        finally:
+            put(('done', None))
+    
+    thread = threading.Thread(target=produce, name="input-scanner", daemon=True)
+    thread.start()
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == 'done':
+                break
+            if kind == 'error':
+                raise value
+            yield value
+    finally:
+        stop.set()
+        thread.join()
+
+def _process_input_file_worker(converter, kind, path):
+    """工作进程入口：处理单个文件并返回其输出文本，由主进程按顺序打印"""
+    buffer = StringIO()
+    converter.encode_stats = new_encode_stats()
+    converter.strategy_stats = dict.fromkeys(converter.strategy_stats, 0)
+    if converter.metrics is not None:
+        converter.metrics = ConversionMetrics()
+    if converter.single_archive:
+        # 单一归档由主进程写入，工作进程只在内存中收集输出
+        from sinks import BundleCollector
+        converter.batch_archive = BundleCollector()
+    with redirect_stdout(buffer):
+        converter.process_input_file(kind, path)
+    records = converter.metrics.records if converter.metrics is not None else []
+    bundles = converter.batch_archive.bundles if converter.single_archive else {}
+    return buffer.getvalue(), converter.encode_stats, converter.strategy_stats, records, bundles
+
+def _detect_source_kind(data, name=None):
+    """根据文件扩展名或文件头判断输入是SVG还是PNG"""
+    suffix = Path(name).suffix.lower() if name else ''
+    if suffix in ('.svg', '.png'):
+        return suffix[1:]
+    return 'png' if bytes(data[:8]) == b'\x89PNG\r\n\x1a\n' else 'svg'
+
+def convert(source, profile='web', name=None, preset='balanced', strategy='direct'):
+    """把内存中的SVG或PNG转换为尺寸配置中的全部图标，返回 {文件名: 字节}
+    
+    不读写磁盘，也不打印输出，可在调用方自己的线程池或进程池中使用。
+    profile 为配置名 (如 'web')、配置名列表 (如 ['web', 'pwa']) 或配置字典，见 profiles.SIZE_PROFILES；
+    name 用于判断输入类型 (未提供时根据文件头判断) 和错误信息。
+    有图标生成失败时抛出ConversionError
+    """
+    kind = _detect_source_kind(source, name)
+    name = name or f"icon.{kind}"
+    converter = SVGIconConverter(profile=profile)
+    converter.set_encoder_preset(preset)
+    converter.render_strategy = strategy
+    messages = []
+    converter.log = messages.append
+    try:
+        files = converter.convert_to_bundle(kind, Path(name), bytes(source))
+    except Exception as e:
+        raise ConversionError(f"{name}: {str(e) or type(e).__name__}") from e
+    missing = [output for output in converter.output_names() if output not in files]
+    if missing:
+        errors = [message.strip() for message in messages if '失败' in message]
+        raise ConversionError(f"{name}: {len(missing)} 个文件生成失败 ({', '.join(missing)})"
+                              + ''.join(f"\n  {error}" for error in errors))
+    return files
+
+def convert_many(sources, profile='web', workers=None, preset='balanced', strategy='direct', timeout=None):
+    """批量转换，按输入顺序产出 (name, {文件名: 字节})
+    
+    sources 为 (name, 字节) 对或字节的可迭代对象，可以是边读取边产出的生成器，
+    同时在处理中的文件不超过 workers*2。workers 为工作进程数 (默认使用全部CPU核心)，
+    1 表示在当前进程中依次转换。timeout 为单个文件的处理时间上限 (秒)。
+    某个文件失败时抛出ConversionError (超时为workers.WorkerTimeout)，其余文件不再产出
+    """
+    workers = workers or os.cpu_count() or 1
+    items = ((None, item) if isinstance(item, (bytes, bytearray, memoryview)) else item for item in sources)
+    if workers == 1 and not timeout:
+        for name, data in items:
+            yield name, convert(data, profile, name, preset, strategy)
+        return
+    
+    from collections import deque
+    from workers import IsolatedProcessPool
+    in_flight = deque()
+    with IsolatedProcessPool(workers, timeout=timeout) as pool:
+        for name, data in items:
+            in_flight.append((name, pool.submit(convert, bytes(data), profile, name, preset, strategy)))
+            if len(in_flight) >= workers * 2:
+                name, future = in_flight.popleft()
+                yield name, future.result()
+        while in_flight:
+            name, future = in_flight.popleft()
+            yield name, future.result()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="将SVG或PNG转换为前端开发所需的各种格式和尺寸")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="并行处理文件的进程数 (默认: 1, 0 表示使用全部CPU核心)",
+    )
+    parser.add_argument(
+        "-f", "--force", action="store_true",
+        help="忽略构建清单，重新生成所有文件",
+    )
+    parser.add_argument(
+        "-w", "--watch", action="store_true",
+        help="转换后持续监视input目录，只重新转换发生变化的文件",
+    )
+    parser.add_argument(
+        "--watch-interval", type=float, default=0.5,
+        help="监视模式下扫描目录的间隔秒数 (默认: 0.5)",
+    )
+    parser.add_argument(
+        "--config", type=Path, default=None,
+        help="JSON配置文件，可设置 input_dir、output_dir、profile 和自定义尺寸配置 profiles",
+    )
+    parser.add_argument(
+        "--input-dir", type=Path, default=None,
+        help="输入目录 (默认: input，或配置文件中的 input_dir)",
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=None,
+        help="输出目录 (默认: output，或配置文件中的 output_dir)",
+    )
+    parser.add_argument(
+        "--sizes", metavar="PROFILE", default=None,
+        help=f"尺寸配置，多个用逗号分隔: {', '.join(SIZE_PROFILES)} (默认: web，或配置文件中的 profile)",
+    )
+    parser.add_argument(
+        "--preset", choices=sorted(PNG_ENCODER_PRESETS), default='balanced',
+        help="PNG编码预设: fast (开发调试), balanced (默认), max (最小文件)",
+    )
+    parser.add_argument(
+        "--strategy", choices=['direct', 'supersample'], default='direct',
+        help="SVG渲染策略: direct (每个尺寸单独渲染，默认), supersample (复杂SVG渲染一次后降采样)",
+    )
+    parser.add_argument(
+        "--audit-report", type=Path, default=None,
+        help="quality_check.py --json 生成的审计报告，按估算渲染开销从高到低安排转换顺序",
+    )
+    parser.add_argument(
+        "--encode-threads", type=int, default=1,
+        help="每个文件的PNG编码线程数，>1 时编码与渲染并行 (默认: 1)",
+    )
+    parser.add_argument(
+        "--metrics", type=Path, default=None,
+        help="将每个文件各阶段的耗时和计数写入该文件",
+    )
+    parser.add_argument(
+        "--metrics-format", choices=['jsonl', 'prometheus'], default='jsonl',
+        help="计时结果格式: jsonl (每个文件一行) 或 prometheus (文本格式汇总)",
+    )
+    parser.add_argument(
+        "--profile", metavar="FILENAME", default=None,
+        help="用cProfile分析指定的输入文件 (如 logo.svg)，结果保存到输出目录",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None,
+        help="单个文件的处理时间上限，单位秒，超时的文件被跳过 (默认: 不限制)",
+    )
+    parser.add_argument(
+        "--memory-limit", type=int, default=None,
+        help="每个工作进程的内存 (地址空间) 上限，单位MB，超出的文件被跳过 (默认: 不限制)",
+    )
+    parser.add_argument(
+        "--cache-dir", type=Path, default=None,
+        help="渲染结果缓存目录，可指向多个项目/机器共享的路径 (默认: 不使用缓存)",
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=1024,
+        help="渲染缓存容量上限，单位MB (默认: 1024)",
+    )
+    parser.add_argument(
+        "--output-format", choices=['dir', 'zip', 'tar'], default='dir',
+        help="输出方式: dir (每个文件一个目录，默认), zip/tar (每个文件一个归档)",
+    )
+    parser.add_argument(
+        "--single-archive", action="store_true",
+        help=f"与 --output-format zip/tar 一起使用，所有图标写入输出目录中的同一个归档 {BATCH_ARCHIVE_NAME}.zip/.tar",
+    )
+    args = parser.parse_args(argv)
+    if args.single_archive and args.output_format == 'dir':
+        parser.error("--single-archive 需要与 --output-format zip 或 tar 一起使用")
+    if args.single_archive and args.watch:
+        parser.error("监视模式不支持 --single-archive")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = args.jobs or os.cpu_count() or 1
+    
     print("🎨 SVG/PNG图标转换器 - 高质量版本")
     print("将SVG或PNG转换为前端开发所需的各种格式和尺寸")
     print("=" * 50)
     
-    converter = SVGIconConverter()
-    converter.convert_all()
+    try:
+        config = load_config(args.config) if args.config else {}
+        converter = SVGIconConverter(
+            input_dir=args.input_dir or config.get('input_dir', "input"),
+            output_dir=args.output_dir or config.get('output_dir', "output"),
+            profile=args.sizes or config.get('profile', 'web'),
+            profiles=config.get('profiles'),
+        )
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ 配置无效: {e}")
+    converter.set_encoder_preset(args.preset)
+    converter.encode_threads = args.encode_threads
+    converter.render_strategy = args.strategy
+    if args.audit_report:
+        converter.load_audit_report(args.audit_report)
+    converter.profile_target = args.profile
+    converter.file_timeout = args.timeout
+    if args.memory_limit:
+        converter.file_memory_limit = args.memory_limit * 1024 * 1024
+    if args.metrics:
+        converter.metrics = ConversionMetrics()
+    if args.cache_dir:
+        converter.render_cache = RenderCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    converter.output_format = args.output_format
+    converter.single_archive = args.single_archive
+    if args.watch:
+        converter.watch(interval=args.watch_interval, debounce=args.watch_interval, jobs=jobs)
+    else:
+        converter.convert_all(jobs=jobs, force=args.force)
+    
+    if converter.metrics is not None:
+        converter.metrics.write(args.metrics, args.metrics_format)
+        print(f"\n📊 计时结果已保存: {args.metrics}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
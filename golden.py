@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图标输出的像素回归检查
+把输出目录 (如 output/sample-icon/*.png) 与保存的参考图像逐一对比：字节相同的文件只比较哈希，
+不同的文件解码后逐通道比较 (含透明度)，按尺寸检查PSNR/SSIM阈值，在多个进程中并行处理
+
+    python golden.py update                        # 用当前输出更新参考图像
+    python golden.py check --json report.json      # 对比当前输出与参考图像，有变化时返回非零退出码
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from io import BytesIO
+from itertools import repeat
+from pathlib import Path
+
+GOLDEN_VERSION = 1
+
+# 参考目录中记录各文件哈希的索引，检查时不需要读取字节相同的参考文件
+INDEX_NAME = "index.json"
+
+IMAGE_SUFFIXES = ('.png', '.ico')
+
+# 默认阈值：PSNR (dB) 或 SSIM 低于阈值的图像视为发生了变化
+DEFAULT_PSNR = 40.0
+DEFAULT_SSIM = 0.99
+
+# SSIM的窗口大小 (像素)；大于该尺寸的图像先按整数倍平均降采样再计算SSIM (与SSIM参考实现相同)
+SSIM_WINDOW = 7
+SSIM_DOWNSAMPLE_SIZE = 256
+
+# 比较结果按严重程度排列，FAILED 中的状态视为检查失败
+STATUSES = ('identical', 'equivalent', 'similar', 'new', 'changed', 'missing', 'error')
+FAILED = ('changed', 'missing', 'error')
+
+STATUS_LABELS = {
+    'identical': "字节相同",
+    'equivalent': "像素相同",
+    'similar': "在阈值内",
+    'new': "新增",
+    'changed': "发生变化",
+    'missing': "缺少",
+    'error': "出错",
+}
+
+def find_images(directory):
+    """递归查找目录中的PNG和ICO文件，返回排序后的相对路径，跳过以 . 开头的隐藏文件和目录"""
+    directory = Path(directory)
+    names = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        relative = Path(root).relative_to(directory)
+        for name in files:
+            if not name.startswith('.') and os.path.splitext(name)[1].lower() in IMAGE_SUFFIXES:
+                names.append((relative / name).as_posix())
+    return sorted(names)
+
+def load_index(golden_dir):
+    """读取参考图像的哈希索引，不存在或损坏时返回空索引"""
+    try:
+        with open(Path(golden_dir) / INDEX_NAME, encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == GOLDEN_VERSION:
+            return index['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+def update_golden(args):
+    """用当前输出替换参考图像，并重建哈希索引"""
+    output_dir, golden_dir = Path(args.output), Path(args.golden)
+    names = find_images(output_dir)
+    if not names:
+        print(f"❌ 在 {output_dir} 中没有找到PNG或ICO文件")
+        return 1
+
+    stale = set(find_images(golden_dir)) - set(names) if golden_dir.is_dir() else set()
+    for name in stale:
+        (golden_dir / name).unlink()
+
+    index = {}
+    for name in names:
+        data = (output_dir / name).read_bytes()
+        target = golden_dir / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        index[name] = hashlib.sha256(data).hexdigest()
+
+    index_path = golden_dir / INDEX_NAME
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': GOLDEN_VERSION, 'files': index}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_path)
+    print(f"✅ 已更新 {len(names)} 个参考图像: {golden_dir}" + (f" (删除 {len(stale)} 个)" if stale else ""))
+    return 0
+
+def decode_frames(data):
+    """解码图像，返回 {(宽, 高): RGBA图像}；ICO文件返回其中的每一帧"""
+    from PIL import Image
+    with Image.open(BytesIO(data)) as image:
+        if image.format == 'ICO':
+            return {size: image.ico.getimage(size).convert('RGBA') for size in image.ico.sizes()}
+        return {image.size: image.convert('RGBA')}
+
+def premultiplied(image):
+    """RGBA图像转为预乘透明度的 4×H×W 浮点数组 (按通道连续存放)，完全透明像素的颜色不影响比较"""
+    import numpy as np
+    pixels = np.asarray(image, dtype=np.float32).transpose(2, 0, 1).copy()
+    pixels[:3] *= pixels[3] / 255
+    return pixels
+
+def _downsample(x, factor):
+    """按 factor×factor 块取平均"""
+    channels, height, width = x.shape
+    height, width = height // factor * factor, width // factor * factor
+    x = x[:, :height, :width].reshape(channels, height // factor, factor, width // factor, factor)
+    return x.mean(axis=(2, 4))
+
+def _window_means(x, window):
+    """x (C×H×W) 中每个完整的 window×window 窗口的均值
+
+    逐行、逐列累加平移后的切片，窗口内的和很小，float32即可保持精度
+    """
+    height = x.shape[1] - window + 1
+    rows = x[:, :height].copy()
+    for offset in range(1, window):
+        rows += x[:, offset:offset + height]
+    width = x.shape[2] - window + 1
+    means = rows[:, :, :width].copy()
+    for offset in range(1, window):
+        means += rows[:, :, offset:offset + width]
+    means /= window * window
+    return means
+
+def _luma_alpha(x):
+    """预乘透明度的RGBA数组转为亮度和透明度两个通道"""
+    import numpy as np
+    return np.stack((0.299 * x[0] + 0.587 * x[1] + 0.114 * x[2], x[3]))
+
+def structural_similarity(a, b):
+    """平均结构相似度 (SSIM)，在亮度和透明度通道上分别计算后取平均，使用均匀窗口"""
+    import numpy as np
+    a, b = _luma_alpha(a), _luma_alpha(b)
+    factor = max(1, round(min(a.shape[1:]) / SSIM_DOWNSAMPLE_SIZE))
+    if factor > 1:
+        a, b = _downsample(a, factor), _downsample(b, factor)
+    channels = a.shape[0]
+    window = min(SSIM_WINDOW, a.shape[1], a.shape[2])
+    # 五个窗口统计量合并为一次计算
+    means = _window_means(np.concatenate((a, b, a * a, b * b, a * b)), window)
+    mu_a, mu_b, aa, bb, ab = (means[i * channels:(i + 1) * channels] for i in range(5))
+    var_a = aa - mu_a * mu_a
+    var_b = bb - mu_b * mu_b
+    cov = ab - mu_a * mu_b
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    ssim = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a * mu_a + mu_b * mu_b + c1) * (var_a + var_b + c2))
+    return float(ssim.mean(dtype=np.float64))
+
+def image_metrics(a, b, min_psnr=None):
+    """逐通道比较两幅预乘透明度的图像，返回 (各通道最大差值 [R, G, B, A], PSNR, SSIM)
+
+    像素完全相同时PSNR为None (无穷大)。PSNR低于min_psnr时已可判定为发生变化，
+    不再计算开销较大的SSIM，SSIM返回None
+    """
+    diff = a - b
+    max_diff = [round(float(value), 1) for value in abs(diff).max(axis=(1, 2))]
+    mse = float((diff * diff).mean(dtype='float64'))
+    if mse == 0:
+        return max_diff, None, 1.0
+    psnr = 10 * math.log10(255 ** 2 / mse)
+    if min_psnr is not None and psnr < min_psnr:
+        return max_diff, psnr, None
+    return max_diff, psnr, structural_similarity(a, b)
+
+def threshold_for(thresholds, size):
+    """指定尺寸的 (最低PSNR, 最低SSIM)，没有单独设置时使用默认阈值 (键为0)"""
+    return thresholds.get(size, thresholds[0])
+
+def write_diff_image(a, b, path):
+    """保存差异图：各通道最大差值放大4倍的灰度图"""
+    import numpy as np
+    from PIL import Image
+    diff = np.clip(abs(a - b).max(axis=0) * 4, 0, 255).astype(np.uint8)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(diff).save(path)
+
+def compare_file(output_dir, golden_dir, name, expected_digest, thresholds, diff_dir=None):
+    """比较单个输出文件与参考图像，返回比较记录
+
+    字节哈希相同时直接返回，不解码；像素完全相同时不计算PSNR/SSIM；
+    ICO文件逐帧比较，记录PSNR最低的一帧
+    """
+    record = {'file': name, 'status': None, 'size': None, 'psnr': None, 'ssim': None,
+              'max_diff': None, 'message': None}
+    try:
+        data = (output_dir / name).read_bytes()
+        golden_data = None
+        if expected_digest is None:
+            golden_data = (golden_dir / name).read_bytes()
+            expected_digest = hashlib.sha256(golden_data).hexdigest()
+        if hashlib.sha256(data).hexdigest() == expected_digest:
+            record['status'] = 'identical'
+            return record
+
+        if golden_data is None:
+            golden_data = (golden_dir / name).read_bytes()
+        new_frames = decode_frames(data)
+        old_frames = decode_frames(golden_data)
+        if set(new_frames) != set(old_frames):
+            record['status'] = 'changed'
+            record['message'] = f"尺寸不同: {sorted(old_frames)} -> {sorted(new_frames)}"
+            return record
+
+        status = 'equivalent'
+        worst = None
+        for size in sorted(new_frames):
+            a = premultiplied(old_frames[size])
+            b = premultiplied(new_frames[size])
+            min_psnr, min_ssim = threshold_for(thresholds, size[0])
+            max_diff, psnr, ssim = image_metrics(a, b, min_psnr)
+            if psnr is None:
+                frame_status = 'equivalent'
+            elif ssim is not None and ssim >= min_ssim:
+                frame_status = 'similar'
+            else:
+                frame_status = 'changed'
+            status = max(status, frame_status, key=STATUSES.index)
+            # 记录差异最大 (PSNR最低) 的一帧
+            if worst is None or (psnr is not None and (worst[1] is None or psnr < worst[1])):
+                worst = (size, psnr, ssim, max_diff, a, b)
+
+        size, psnr, ssim, max_diff, a, b = worst
+        record.update(status=status, size=size[0], psnr=psnr, ssim=ssim, max_diff=max_diff)
+        if status == 'changed' and diff_dir is not None:
+            write_diff_image(a, b, diff_dir / Path(name).with_suffix('.diff.png'))
+    except Exception as e:
+        record['status'] = 'error'
+        record['message'] = str(e) or type(e).__name__
+    return record
+
+def compare_all(output_dir, golden_dir, thresholds, jobs=None, diff_dir=None):
+    """并行比较输出目录与参考目录中的所有图像，返回按文件路径排序的比较记录"""
+    output_names = find_images(output_dir)
+    golden_names = set(find_images(golden_dir))
+    index = load_index(golden_dir)
+    names = [name for name in output_names if name in golden_names]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(names) <= 1:
+        records = [compare_file(output_dir, golden_dir, name, index.get(name), thresholds, diff_dir)
+                   for name in names]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        # 每个工作进程一次处理一批文件，减少进程间通信
+        chunksize = max(1, len(names) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            records = list(executor.map(
+                compare_file, repeat(output_dir), repeat(golden_dir), names,
+                [index.get(name) for name in names], repeat(thresholds), repeat(diff_dir),
+                chunksize=chunksize,
+            ))
+
+    blank = {'size': None, 'psnr': None, 'ssim': None, 'max_diff': None}
+    records += [{'file': name, 'status': 'missing', **blank, 'message': "输出中缺少该文件"}
+                for name in golden_names - set(output_names)]
+    records += [{'file': name, 'status': 'new', **blank, 'message': "参考图像中没有该文件"}
+                for name in set(output_names) - golden_names]
+    return sorted(records, key=lambda record: record['file'])
+
+def _format_psnr(psnr):
+    return "∞" if psnr is None else f"{psnr:.2f}"
+
+def _format_ssim(ssim):
+    # PSNR未达到阈值时不计算SSIM
+    return "-" if ssim is None else f"{ssim:.4f}"
+
+def print_size_table(records):
+    """按尺寸汇总解码比较过的图像：数量、变化数、最低PSNR和SSIM"""
+    by_size = {}
+    for record in records:
+        if record['size'] is not None:
+            by_size.setdefault(record['size'], []).append(record)
+    if not by_size:
+        return
+    print(f"\n{'尺寸':>6} {'数量':>6} {'变化':>6} {'最低PSNR':>10} {'最低SSIM':>10}")
+    print("-" * 44)
+    for size in sorted(by_size):
+        group = by_size[size]
+        changed = sum(1 for record in group if record['status'] == 'changed')
+        psnrs = [record['psnr'] for record in group if record['psnr'] is not None]
+        min_psnr = _format_psnr(min(psnrs) if psnrs else None)
+        ssims = [record['ssim'] for record in group if record['ssim'] is not None]
+        min_ssim = _format_ssim(min(ssims) if ssims else None)
+        print(f"{size:>6} {len(group):>6} {changed:>6} {min_psnr:>10} {min_ssim:>10}")
+
+def check_golden(args):
+    """对比当前输出与参考图像，有变化、缺少或出错的文件时返回1"""
+    output_dir, golden_dir = Path(args.output), Path(args.golden)
+    if not golden_dir.is_dir():
+        print(f"❌ 参考目录不存在: {golden_dir}，请先运行 python golden.py update")
+        return 1
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("❌ 像素比较需要numpy: pip install numpy")
+        return 1
+
+    thresholds = {0: (args.psnr, args.ssim), **dict(args.size_threshold)}
+    start = time.perf_counter()
+    records = compare_all(output_dir, golden_dir, thresholds, args.jobs, args.diff_dir)
+    elapsed = time.perf_counter() - start
+
+    counts = {status: 0 for status in STATUSES}
+    for record in records:
+        counts[record['status']] += 1
+    print(f"🔍 对比 {len(records)} 个图像 (输出: {output_dir}, 参考: {golden_dir}), 用时 {elapsed:.2f}s")
+    print("  " + ", ".join(f"{STATUS_LABELS[status]} {count}" for status, count in counts.items() if count))
+    print_size_table(records)
+
+    if args.json:
+        report = {
+            'version': GOLDEN_VERSION,
+            'output_dir': str(output_dir),
+            'golden_dir': str(golden_dir),
+            'thresholds': {str(size): list(values) for size, values in thresholds.items()},
+            'summary': counts,
+            'files': records,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 JSON报告已保存: {args.json}")
+
+    failures = [record for record in records if record['status'] in FAILED]
+    if failures:
+        print(f"\n❌ {len(failures)} 个图像与参考不一致:")
+        for record in failures[:args.limit]:
+            detail = record['message'] or (
+                f"{record['size']}px PSNR {_format_psnr(record['psnr'])} SSIM {_format_ssim(record['ssim'])} "
+                f"最大差值 RGBA {record['max_diff']}")
+            print(f"  • {record['file']}: {STATUS_LABELS[record['status']]} - {detail}")
+        if len(failures) > args.limit:
+            print(f"  ... 另有 {len(failures) - args.limit} 个，见 --json 报告")
+        if args.diff_dir:
+            print(f"🖼️ 差异图已保存到: {args.diff_dir}")
+        return 1
+    print("\n✅ 所有图像都与参考一致")
+    return 0
+
+def _size_threshold(value):
+    """解析 --size-threshold SIZE:PSNR:SSIM"""
+    try:
+        size, psnr, ssim = value.split(':')
+        return int(size), (float(psnr), float(ssim))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"格式应为 尺寸:PSNR:SSIM，如 16:32:0.95，而不是 {value!r}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="图标输出的像素回归检查")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    update = commands.add_parser('update', help="用当前输出更新参考图像")
+    check = commands.add_parser('check', help="对比当前输出与参考图像")
+    for command in (update, check):
+        command.add_argument("--output", default="output", help="转换输出目录 (默认: output)")
+        command.add_argument("--golden", default="golden", help="参考图像目录 (默认: golden)")
+
+    check.add_argument("--psnr", type=float, default=DEFAULT_PSNR, help=f"最低PSNR，单位dB (默认: {DEFAULT_PSNR})")
+    check.add_argument("--ssim", type=float, default=DEFAULT_SSIM, help=f"最低SSIM (默认: {DEFAULT_SSIM})")
+    check.add_argument(
+        "--size-threshold", type=_size_threshold, action='append', default=[], metavar="SIZE:PSNR:SSIM",
+        help="为指定尺寸单独设置阈值，可重复使用，如 --size-threshold 16:32:0.95",
+    )
+    check.add_argument(
+        "-j", "--jobs", type=int, default=0,
+        help="并行进程数 (默认: 0 表示使用全部CPU核心)",
+    )
+    check.add_argument("--json", type=Path, default=None, help="将每个图像的比较结果写入JSON报告")
+    check.add_argument("--diff-dir", type=Path, default=None, help="为发生变化的图像保存差异图")
+    check.add_argument("--limit", type=int, default=20, help="最多列出的不一致文件数 (默认: 20)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🖼️ 图标像素回归检查")
+    print("=" * 50)
+    if args.command == 'update':
+        return update_golden(args)
+    return check_golden(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
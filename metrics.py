@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+转换过程的计时和计数
+按文件、按尺寸记录各阶段 (读取、解析、栅格化、锐化、缩放、编码、写入、ICO生成) 的耗时，
+并统计缓存命中和失败次数，可输出为JSON Lines或Prometheus文本格式
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# 记录的阶段，按转换流程排序
+STAGES = ('read', 'parse', 'rasterize', 'sharpen', 'resize', 'encode', 'write', 'ico')
+
+class FileMetrics:
+    """单个输入文件的计时和计数，编码线程可以同时记录"""
+
+    def __init__(self, source, kind):
+        self.source = str(source)
+        self.kind = kind
+        self.stages = {}
+        self.sizes = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, size=None):
+        """计时一个阶段，size不为None时同时计入该尺寸"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, size)
+
+    def add(self, stage, seconds, size=None):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            if size is not None:
+                per_size = self.sizes.setdefault(size, {})
+                per_size[stage] = per_size.get(stage, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self):
+        """结束计时并返回可序列化的记录"""
+        return {
+            'file': self.source,
+            'kind': self.kind,
+            'seconds': time.perf_counter() - self._start,
+            'stages': dict(sorted(self.stages.items(), key=lambda item: _stage_order(item[0]))),
+            'sizes': {str(size): stages for size, stages in sorted(self.sizes.items())},
+            'counters': dict(sorted(self.counters.items())),
+        }
+
+def _stage_order(stage):
+    return STAGES.index(stage) if stage in STAGES else len(STAGES)
+
+class ConversionMetrics:
+    """一次运行中所有文件的记录"""
+
+    def __init__(self):
+        self.records = []
+
+    def start_file(self, source, kind):
+        return FileMetrics(source, kind)
+
+    def finish_file(self, file_metrics):
+        self.records.append(file_metrics.to_dict())
+
+    def totals(self):
+        """汇总所有文件的阶段耗时和计数"""
+        stages = {}
+        counters = {}
+        files = {}
+        for record in self.records:
+            files[record['kind']] = files.get(record['kind'], 0) + 1
+            for stage, seconds in record['stages'].items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+            for name, amount in record['counters'].items():
+                counters[name] = counters.get(name, 0) + amount
+        return files, stages, counters
+
+    def slowest(self, count=5):
+        return sorted(self.records, key=lambda record: record['seconds'], reverse=True)[:count]
+
+    def write(self, path, format='jsonl'):
+        if format == 'prometheus':
+            self.write_prometheus(path)
+        else:
+            self.write_jsonl(path)
+
+    def write_jsonl(self, path):
+        """每个文件一行JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path):
+        """Prometheus文本格式 (可用于node_exporter的textfile收集器)"""
+        files, stages, counters = self.totals()
+        seconds = [record['seconds'] for record in self.records]
+        lines = [
+            "# HELP icon_converter_files_total Input files processed.",
+            "# TYPE icon_converter_files_total counter",
+        ]
+        lines += [f'icon_converter_files_total{{kind="{kind}"}} {n}' for kind, n in sorted(files.items())]
+        lines += [
+            "# HELP icon_converter_stage_seconds_total Time spent in each conversion stage.",
+            "# TYPE icon_converter_stage_seconds_total counter",
+        ]
+        lines += [f'icon_converter_stage_seconds_total{{stage="{stage}"}} {value:.6f}'
+                  for stage, value in sorted(stages.items(), key=lambda item: _stage_order(item[0]))]
+        lines += [
+            "# HELP icon_converter_events_total Cache hits, misses and failures.",
+            "# TYPE icon_converter_events_total counter",
+        ]
+        lines += [f'icon_converter_events_total{{event="{name}"}} {n}' for name, n in sorted(counters.items())]
+        lines += [
+            "# HELP icon_converter_file_seconds Wall-clock time per input file.",
+            "# TYPE icon_converter_file_seconds summary",
+            f"icon_converter_file_seconds_sum {sum(seconds):.6f}",
+            f"icon_converter_file_seconds_count {len(seconds)}",
+            "# HELP icon_converter_file_seconds_max Slowest input file.",
+            "# TYPE icon_converter_file_seconds_max gauge",
+            f"icon_converter_file_seconds_max {max(seconds, default=0):.6f}",
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
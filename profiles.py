@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+图标尺寸配置
+每个配置列出要生成的文件，可以组合多个配置 (如 web + pwa)，也可以在JSON配置文件中定义新的配置
+
+    png_sizes     通用尺寸，生成 icon-{size}x{size}.png
+    ico_sizes     favicon.ico 包含的尺寸 (最大256)，为空时不生成ICO
+    special_icons 指定文件名的图标 {文件名: 尺寸}，文件名可包含子目录
+    padded_icons  带安全边距的图标 {文件名: [画布尺寸, 内容尺寸]}，内容居中，四周透明
+    favicon_size  单独的favicon.png的尺寸，null 表示不生成
+"""
+
+import json
+from pathlib import Path
+
+PROFILE_DEFAULTS = {
+    'png_sizes': [],
+    'ico_sizes': [],
+    'special_icons': {},
+    'padded_icons': {},
+    'favicon_size': None,
+}
+
+# Android各屏幕密度相对mdpi的倍数
+ANDROID_DENSITIES = {'mdpi': 1, 'hdpi': 1.5, 'xhdpi': 2, 'xxhdpi': 3, 'xxxhdpi': 4}
+
+SIZE_PROFILES = {
+    # 网站：favicon、通用尺寸和常见平台的书签/磁贴图标
+    'web': {
+        'png_sizes': [16, 32, 48, 64, 96, 128, 192, 256, 512],
+        'ico_sizes': [16, 32, 48],
+        'special_icons': {
+            'apple-touch-icon.png': 180,
+            'android-chrome-192x192.png': 192,
+            'android-chrome-512x512.png': 512,
+            'mstile-150x150.png': 150,
+        },
+        'favicon_size': 32,
+    },
+    # PWA manifest：普通图标和maskable图标 (内容在中间80%的安全区域内)
+    'pwa': {
+        'special_icons': {
+            'pwa-192x192.png': 192,
+            'pwa-512x512.png': 512,
+        },
+        'padded_icons': {
+            'maskable-icon-192x192.png': [192, 154],
+            'maskable-icon-512x512.png': [512, 410],
+        },
+    },
+    # iOS应用图标 (AppIcon.appiconset)，按 点数@倍数 命名
+    'ios': {
+        'special_icons': {
+            'AppIcon-20@2x.png': 40,
+            'AppIcon-20@3x.png': 60,
+            'AppIcon-29@2x.png': 58,
+            'AppIcon-29@3x.png': 87,
+            'AppIcon-40@2x.png': 80,
+            'AppIcon-40@3x.png': 120,
+            'AppIcon-60@2x.png': 120,
+            'AppIcon-60@3x.png': 180,
+            'AppIcon-76.png': 76,
+            'AppIcon-76@2x.png': 152,
+            'AppIcon-83.5@2x.png': 167,
+            'AppIcon-1024.png': 1024,
+        },
+    },
+    # Android启动图标：各密度的传统图标 (48dp)、自适应图标前景层 (108dp画布，内容在中间72dp)
+    # 和应用商店图标
+    'android': {
+        'special_icons': {
+            **{f"mipmap-{density}/ic_launcher.png": round(48 * scale)
+               for density, scale in ANDROID_DENSITIES.items()},
+            'playstore-icon.png': 512,
+        },
+        'padded_icons': {
+            f"mipmap-{density}/ic_launcher_foreground.png": [round(108 * scale), round(72 * scale)]
+            for density, scale in ANDROID_DENSITIES.items()
+        },
+    },
+}
+
+# 配置文件中允许的键
+CONFIG_KEYS = ('input_dir', 'output_dir', 'profile', 'profiles')
+
+def _positive_int(value, what):
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError(f"{what} 必须是正整数: {value!r}")
+    return value
+
+def _filename(name, what):
+    path = Path(name)
+    if not name or path.is_absolute() or '..' in path.parts or '\\' in name:
+        raise ValueError(f"{what} 的文件名无效: {name!r}")
+    return path.as_posix()
+
+def validate_profile(profile, name='profile'):
+    """检查单个尺寸配置并补全缺少的键，返回新的字典"""
+    if not isinstance(profile, dict):
+        raise ValueError(f"尺寸配置 {name} 必须是对象")
+    unknown = set(profile) - set(PROFILE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"尺寸配置 {name} 包含未知的键: {', '.join(sorted(unknown))}")
+    result = {key: profile.get(key, default) for key, default in PROFILE_DEFAULTS.items()}
+    result['png_sizes'] = [_positive_int(size, f"{name}.png_sizes") for size in result['png_sizes']]
+    result['ico_sizes'] = [_positive_int(size, f"{name}.ico_sizes") for size in result['ico_sizes']]
+    if any(size > 256 for size in result['ico_sizes']):
+        raise ValueError(f"{name}.ico_sizes 不能超过256 (ICO格式限制)")
+    result['special_icons'] = {
+        _filename(icon, name): _positive_int(size, f"{name}.special_icons[{icon}]")
+        for icon, size in result['special_icons'].items()
+    }
+    padded = {}
+    for icon, sizes in result['padded_icons'].items():
+        what = f"{name}.padded_icons[{icon}]"
+        if not isinstance(sizes, (list, tuple)) or len(sizes) != 2:
+            raise ValueError(f"{what} 必须是 [画布尺寸, 内容尺寸]")
+        canvas, content = (_positive_int(size, what) for size in sizes)
+        if content > canvas:
+            raise ValueError(f"{what} 的内容尺寸不能大于画布尺寸")
+        padded[_filename(icon, name)] = [canvas, content]
+    result['padded_icons'] = padded
+    if result['favicon_size'] is not None:
+        _positive_int(result['favicon_size'], f"{name}.favicon_size")
+    return result
+
+def resolve_profile(profile, profiles=None):
+    """把配置名、配置名列表 (或逗号分隔的字符串) 或配置字典解析为完整的尺寸配置
+
+    profiles 为配置文件中定义的其他配置。组合多个配置时尺寸取并集，同名文件以靠后的配置为准。
+    返回的字典还包含 'names'：参与组合的配置名
+    """
+    available = {**SIZE_PROFILES, **(profiles or {})}
+    if isinstance(profile, dict):
+        parts = [('custom', profile)]
+    else:
+        names = profile.split(',') if isinstance(profile, str) else list(profile)
+        parts = []
+        for name in (name.strip() for name in names):
+            if name not in available:
+                raise ValueError(f"未知的尺寸配置: {name} (可选: {', '.join(sorted(available))})")
+            parts.append((name, available[name]))
+    if not parts:
+        raise ValueError("至少需要一个尺寸配置")
+
+    merged = {**PROFILE_DEFAULTS, 'special_icons': {}, 'padded_icons': {}, 'names': []}
+    for name, part in parts:
+        part = validate_profile(part, name)
+        merged['png_sizes'] = sorted(set(merged['png_sizes']) | set(part['png_sizes']))
+        merged['ico_sizes'] = sorted(set(merged['ico_sizes']) | set(part['ico_sizes']))
+        merged['special_icons'].update(part['special_icons'])
+        merged['padded_icons'].update(part['padded_icons'])
+        if part['favicon_size'] is not None:
+            merged['favicon_size'] = part['favicon_size']
+        merged['names'].append(name)
+    return merged
+
+def load_config(path):
+    """读取JSON配置文件
+
+    可包含 input_dir、output_dir (相对路径以配置文件所在目录为基准)、
+    profile (配置名或配置名列表) 和 profiles (自定义配置 {名称: 配置})
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: 配置文件必须是JSON对象")
+    unknown = set(config) - set(CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"{path}: 未知的配置项: {', '.join(sorted(unknown))}")
+    profiles = config.get('profiles') or {}
+    if not isinstance(profiles, dict):
+        raise ValueError(f"{path}: profiles 必须是对象")
+    for name, profile in profiles.items():
+        validate_profile(profile, name)
+    for key in ('input_dir', 'output_dir'):
+        if key in config:
+            config[key] = path.parent / config[key]
+    # 提前解析一次，尽早报告未知的配置名
+    resolve_profile(config.get('profile', 'web'), profiles)
+    return config
@@ -5,48 +5,66 @@ SVG质量诊断工具
 分析SVG文件并提供质量优化建议
 """
 
-import xml.etree.ElementTree as ET
+import argparse
+import csv
+import json
+import os
+import time
+from itertools import repeat
 from pathlib import Path
+from xml.parsers import expat
 import re
 
+# expat回调中的带命名空间标签名格式为 "命名空间URI}本地名"
+SVG_NS = 'http://www.w3.org/2000/svg}'
+
+# 审计报告的字段 (CSV列顺序)
+AUDIT_VERSION = 1
+AUDIT_FIELDS = (
+    'file', 'size', 'elements', 'paths', 'path_data_length', 'max_path_data_length',
+    'gradients', 'filters', 'texts', 'blur', 'render_cost', 'complex', 'issues', 'error',
+)
+
 class SVGQualityChecker:
-    def __init__(self):
-        self.input_dir = Path("input")
+    def __init__(self, input_dir="input"):
+        self.input_dir = Path(input_dir)
+        
+    def analyze_svg(self, svg_path, data=None):
+        """分析SVG文件质量
         
-    def analyze_svg(self, svg_path):
-        """分析SVG文件质量"""
+        单次流式遍历收集所有指标，内存占用与文件大小无关。
+        data为已读入内存的SVG内容，None时从svg_path读取
+        """
         try:
-            tree = ET.parse(svg_path)
-            root = tree.getroot()
-            
             analysis = {
                 'file': svg_path.name,
-                'size': svg_path.stat().st_size,
+                'size': svg_path.stat().st_size if data is None else len(data),
                 'issues': [],
-                'suggestions': []
+                'suggestions': [],
+                'metrics': {}
             }
             
-            # 检查SVG尺寸设置
-            width = root.get('width')
-            height = root.get('height')
-            viewbox = root.get('viewBox')
+            metrics = self._collect_metrics(svg_path, data)
+            analysis['metrics'] = metrics
             
-            if not viewbox:
+            # 检查SVG尺寸设置
+            if not metrics['viewbox']:
                 analysis['issues'].append("❌ 缺少viewBox属性")
                 analysis['suggestions'].append("添加viewBox属性以确保缩放质量")
             
+            width = metrics['width']
             if width and ('px' in width or 'pt' in width):
                 analysis['issues'].append("⚠️ 使用了绝对单位 (px/pt)")
                 analysis['suggestions'].append("建议移除width/height或使用相对单位")
             
             # 检查复杂元素
-            self._check_complex_elements(root, analysis)
+            self._check_complex_elements(metrics, analysis)
             
             # 检查文本元素
-            self._check_text_elements(root, analysis)
+            self._check_text_elements(metrics, analysis)
             
             # 检查样式和效果
-            self._check_styles_and_effects(root, analysis)
+            self._check_styles_and_effects(metrics, analysis)
             
             # 检查文件大小
             if analysis['size'] > 50000:  # 50KB
@@ -63,78 +81,254 @@ class SVGQualityChecker:
                 'suggestions': ["检查SVG文件是否损坏或格式不正确"]
             }
     
-    def _check_complex_elements(self, root, analysis):
+    def _collect_metrics(self, svg_path, data=None):
+        """单次流式遍历SVG，统计各类元素和属性
+        
+        直接使用expat回调，不构建元素树，读取过的内容不会保留在内存中
+        """
+        metrics = {
+            'width': None,
+            'height': None,
+            'viewbox': None,
+            'elements': 0,
+            'paths': 0,
+            'path_data_length': 0,
+            'max_path_data_length': 0,
+            'gradients': 0,
+            'filters': 0,
+            'texts': 0,
+            'small_fonts': 0,
+            'styled_elements': 0,
+            'low_opacity_elements': 0,
+            'blur': False,
+        }
+        root_seen = False
+        # 上一段文本的末尾，文本可能分多次回调，关键字可能跨越回调边界
+        text_tail = ''
+        
+        def start_element(tag, attrs):
+            nonlocal root_seen, text_tail
+            text_tail = ''
+            if not root_seen:
+                root_seen = True
+                metrics['width'] = attrs.get('width')
+                metrics['height'] = attrs.get('height')
+                metrics['viewbox'] = attrs.get('viewBox')
+            else:
+                self._count_element(tag, attrs, metrics)
+            # 阴影/模糊效果可能出现在标签、属性或文本中
+            if not metrics['blur']:
+                metrics['blur'] = self._mentions_blur(' '.join((tag, *attrs, *attrs.values())))
+        
+        def end_element(tag):
+            nonlocal text_tail
+            text_tail = ''
+        
+        def character_data(data):
+            nonlocal text_tail
+            if not metrics['blur']:
+                text = text_tail + data
+                metrics['blur'] = self._mentions_blur(text)
+                text_tail = text[-len('drop-shadow'):]
+        
+        parser = expat.ParserCreate(namespace_separator='}')
+        parser.buffer_text = True
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.CharacterDataHandler = character_data
+        if data is not None:
+            parser.Parse(data, True)
+        else:
+            with open(svg_path, 'rb') as f:
+                parser.ParseFile(f)
+        return metrics
+    
+    def _mentions_blur(self, text):
+        return 'drop-shadow' in text or 'blur' in text
+    
+    def _count_element(self, tag, attrs, metrics):
+        """统计单个元素 (不含根元素)，只需要开始标签中的属性"""
+        metrics['elements'] += 1
+        if tag == SVG_NS + 'path':
+            length = len(attrs.get('d', ''))
+            metrics['paths'] += 1
+            metrics['path_data_length'] += length
+            metrics['max_path_data_length'] = max(metrics['max_path_data_length'], length)
+        elif tag in (SVG_NS + 'linearGradient', SVG_NS + 'radialGradient'):
+            metrics['gradients'] += 1
+        elif tag == SVG_NS + 'filter':
+            metrics['filters'] += 1
+        elif tag == SVG_NS + 'text':
+            metrics['texts'] += 1
+            # 检查字体大小
+            font_size = attrs.get('font-size', '')
+            if font_size and font_size.replace('px', '').replace('pt', '').isdigit():
+                if float(font_size.replace('px', '').replace('pt', '')) < 12:
+                    metrics['small_fonts'] += 1
+        
+        if 'style' in attrs:
+            metrics['styled_elements'] += 1
+        opacity = attrs.get('opacity')
+        if opacity and float(opacity) < 0.5:
+            metrics['low_opacity_elements'] += 1
+    
+    def _check_complex_elements(self, metrics, analysis):
         """检查复杂元素"""
-        # 查找所有路径
-        paths = root.findall('.//{http://www.w3.org/2000/svg}path')
-        if len(paths) > 20:
-            analysis['issues'].append(f"⚠️ 路径元素过多 ({len(paths)}个)")
+        if metrics['paths'] > 20:
+            analysis['issues'].append(f"⚠️ 路径元素过多 ({metrics['paths']}个)")
             analysis['suggestions'].append("考虑合并路径或简化图形")
         
         # 检查复杂路径
-        for path in paths:
-            d = path.get('d', '')
-            if len(d) > 1000:
-                analysis['issues'].append("⚠️ 存在过于复杂的路径")
-                analysis['suggestions'].append("简化复杂路径以提高渲染质量")
-                break
+        if metrics['max_path_data_length'] > 1000:
+            analysis['issues'].append("⚠️ 存在过于复杂的路径")
+            analysis['suggestions'].append("简化复杂路径以提高渲染质量")
         
         # 检查渐变和滤镜
-        gradients = root.findall('.//{http://www.w3.org/2000/svg}linearGradient') + \
-                   root.findall('.//{http://www.w3.org/2000/svg}radialGradient')
-        if len(gradients) > 5:
-            analysis['issues'].append(f"⚠️ 渐变过多 ({len(gradients)}个)")
+        if metrics['gradients'] > 5:
+            analysis['issues'].append(f"⚠️ 渐变过多 ({metrics['gradients']}个)")
             analysis['suggestions'].append("减少渐变数量可能提高小尺寸图标质量")
         
-        filters = root.findall('.//{http://www.w3.org/2000/svg}filter')
-        if filters:
-            analysis['issues'].append(f"⚠️ 使用了滤镜效果 ({len(filters)}个)")
+        if metrics['filters']:
+            analysis['issues'].append(f"⚠️ 使用了滤镜效果 ({metrics['filters']}个)")
             analysis['suggestions'].append("滤镜在小尺寸下可能效果不佳，考虑简化")
     
-    def _check_text_elements(self, root, analysis):
+    def _check_text_elements(self, metrics, analysis):
         """检查文本元素"""
-        texts = root.findall('.//{http://www.w3.org/2000/svg}text')
-        if texts:
-            analysis['issues'].append(f"⚠️ 包含文本元素 ({len(texts)}个)")
+        if metrics['texts']:
+            analysis['issues'].append(f"⚠️ 包含文本元素 ({metrics['texts']}个)")
             analysis['suggestions'].append("文本在小尺寸下可能不清晰，建议转换为路径")
             
-            # 检查字体大小
-            for text in texts:
-                font_size = text.get('font-size', '')
-                if font_size and font_size.replace('px', '').replace('pt', '').isdigit():
-                    size = float(font_size.replace('px', '').replace('pt', ''))
-                    if size < 12:
-                        analysis['issues'].append("❌ 字体过小 (<12px)")
-                        analysis['suggestions'].append("小字体在图标中可能无法识别")
-    
-    def _check_styles_and_effects(self, root, analysis):
+            # 每个字体过小的文本元素各提示一次
+            for _ in range(metrics['small_fonts']):
+                analysis['issues'].append("❌ 字体过小 (<12px)")
+                analysis['suggestions'].append("小字体在图标中可能无法识别")
+    
+    def _check_styles_and_effects(self, metrics, analysis):
         """检查样式和特效"""
         # 检查内联样式
-        elements_with_style = root.findall(".//*[@style]")
-        if elements_with_style:
+        if metrics['styled_elements']:
             analysis['issues'].append("⚠️ 使用了内联样式")
             analysis['suggestions'].append("考虑将样式转换为属性以提高兼容性")
         
         # 检查透明度
-        elements_with_opacity = root.findall(".//*[@opacity]")
-        complex_opacity = [el for el in elements_with_opacity 
-                          if el.get('opacity') and float(el.get('opacity', 1)) < 0.5]
-        if complex_opacity:
+        if metrics['low_opacity_elements']:
             analysis['issues'].append("⚠️ 使用了低透明度元素")
             analysis['suggestions'].append("低透明度可能影响小图标的视觉效果")
         
         # 检查阴影效果
-        svg_content = ET.tostring(root, encoding='unicode')
-        if 'drop-shadow' in svg_content or 'blur' in svg_content:
+        if metrics['blur']:
             analysis['issues'].append("⚠️ 使用了阴影或模糊效果")
             analysis['suggestions'].append("阴影效果在小尺寸下可能消失")
     
+    def is_complex(self, analysis):
+        """判断是否为复杂图形：使用了滤镜、渐变、阴影/模糊，或路径过多、过长
+        
+        复杂图形的栅格化耗时取决于场景复杂度而不是像素数
+        """
+        metrics = analysis.get('metrics')
+        if not metrics:
+            return False
+        return bool(
+            metrics['filters'] or metrics['gradients'] or metrics['blur']
+            or metrics['paths'] > 20 or metrics['max_path_data_length'] > 1000
+        )
+    
+    def estimate_render_cost(self, metrics):
+        """估算相对渲染开销：栅格化耗时主要取决于路径数据量、元素数量和滤镜/渐变等效果"""
+        if not metrics:
+            return 0.0
+        cost = (
+            1.0
+            + metrics['path_data_length'] / 1000
+            + metrics['elements'] * 0.05
+            + metrics['texts'] * 0.5
+            + metrics['gradients'] * 2
+            + metrics['filters'] * 10
+            + (5 if metrics['blur'] else 0)
+        )
+        return round(cost, 2)
+    
+    def find_svg_files(self):
+        """递归查找输入目录中的SVG文件，跳过以 . 开头的隐藏文件和目录"""
+        return sorted(
+            path for path in self.input_dir.rglob("*")
+            if path.suffix.lower() == '.svg' and path.is_file()
+            and not any(part.startswith('.') for part in path.relative_to(self.input_dir).parts)
+        )
+    
+    def audit_record(self, svg_path):
+        """单个文件的审计记录：数值指标、估算渲染开销和问题列表"""
+        analysis = self.analyze_svg(svg_path)
+        metrics = analysis.get('metrics') or {}
+        try:
+            name = svg_path.relative_to(self.input_dir).as_posix()
+        except ValueError:
+            name = svg_path.name
+        record = {field: metrics.get(field) for field in AUDIT_FIELDS}
+        record.update({
+            'file': name,
+            'size': analysis['size'] if 'size' in analysis else svg_path.stat().st_size,
+            'render_cost': self.estimate_render_cost(metrics),
+            'complex': self.is_complex(analysis),
+            'issues': analysis['issues'],
+            'error': analysis.get('error'),
+        })
+        return record
+    
+    def audit(self, jobs=None):
+        """并行审计输入目录中的所有SVG文件，返回按文件路径排序的审计记录"""
+        svg_files = self.find_svg_files()
+        jobs = jobs or os.cpu_count() or 1
+        if jobs <= 1 or len(svg_files) <= 1:
+            return [self.audit_record(path) for path in svg_files]
+        
+        from concurrent.futures import ProcessPoolExecutor
+        # 每个工作进程一次处理一批文件，减少进程间通信
+        chunksize = max(1, len(svg_files) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(_audit_file, repeat(self.input_dir), svg_files, chunksize=chunksize))
+    
+    def write_audit_json(self, records, path):
+        # 记录绝对路径，转换器据此确认报告中的相对路径与自己的输入目录对应
+        report = {'version': AUDIT_VERSION, 'input_dir': str(self.input_dir.resolve()), 'files': records}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    def write_audit_csv(self, records, path):
+        """每个文件一行，问题列表用 "; " 连接"""
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=AUDIT_FIELDS)
+            writer.writeheader()
+            for record in records:
+                writer.writerow({**record, 'issues': "; ".join(record['issues'])})
+    
+    def run_audit(self, json_path=None, csv_path=None, jobs=None):
+        """批量审计并输出机器可读的报告"""
+        start = time.perf_counter()
+        records = self.audit(jobs)
+        if not records:
+            print(f"❌ 在 {self.input_dir} 目录中没有找到SVG文件")
+            return records
+        if json_path:
+            self.write_audit_json(records, json_path)
+            print(f"📄 JSON报告已保存: {json_path}")
+        if csv_path:
+            self.write_audit_csv(records, csv_path)
+            print(f"📄 CSV报告已保存: {csv_path}")
+        
+        with_issues = sum(1 for record in records if record['issues'])
+        errors = sum(1 for record in records if record['error'])
+        complex_files = sum(1 for record in records if record['complex'])
+        print(f"🔍 审计 {len(records)} 个SVG文件, 用时 {time.perf_counter() - start:.2f}s: "
+              f"有问题 {with_issues} 个, 复杂图形 {complex_files} 个, 解析失败 {errors} 个")
+        return records
+    
     def check_all_files(self):
         """检查所有SVG文件"""
         svg_files = list(self.input_dir.glob("*.svg"))
         
         if not svg_files:
-            print("❌ 在input目录中没有找到SVG文件")
+            print(f"❌ 在 {self.input_dir} 目录中没有找到SVG文件")
             return
         
         print("🔍 SVG质量诊断报告")
@@ -198,12 +392,34 @@ class SVGQualityChecker:
    • 验证细节是否保留
 """)
 
-def main():
+def _audit_file(input_dir, svg_path):
+    """工作进程入口：审计单个文件"""
+    checker = SVGQualityChecker()
+    checker.input_dir = input_dir
+    return checker.audit_record(svg_path)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="分析SVG文件并提供质量优化建议")
+    parser.add_argument("--input-dir", type=Path, default=Path("input"), help="SVG文件所在目录 (默认: input)")
+    parser.add_argument("--json", type=Path, default=None, help="批量审计，将结果写入JSON报告")
+    parser.add_argument("--csv", type=Path, default=None, help="批量审计，将结果写入CSV报告")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=0,
+        help="批量审计的并行进程数 (默认: 0 表示使用全部CPU核心)",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    checker = SVGQualityChecker(args.input_dir)
+    if args.json or args.csv:
+        checker.run_audit(args.json, args.csv, args.jobs)
+        return
+    
     print("🔍 SVG质量诊断工具")
     print("分析SVG文件并提供优化建议")
     print("=" * 50)
     
-    checker = SVGQualityChecker()
     checker.check_all_files()
 
 if __name__ == "__main__":
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SVG/PNG图标转换服务
+常驻进程，通过本地HTTP接口提供图标转换，避免每次调用都重新启动Python和加载依赖
+
+    POST /convert?name=logo.svg   请求体为SVG或PNG文件内容，返回包含全部图标的zip
+    GET  /health                  返回服务状态
+"""
+
+import argparse
+import json
+import os
+import threading
+import zipfile
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from convert import PNG_ENCODER_PRESETS, SVGIconConverter
+from workers import IsolatedProcessPool, WorkerCrashed, WorkerTimeout
+
+# 工作进程中常驻的转换器
+_worker_converter = None
+
+def _init_worker(preset):
+    """工作进程初始化：预先加载依赖并创建转换器"""
+    global _worker_converter
+    # convert.py 按需导入依赖，这里提前加载，使第一个请求也不需要等待导入
+    import PIL.Image
+    import PIL.ImageFilter
+    try:
+        import cairosvg.surface
+    except (ImportError, OSError) as e:
+        print(f"⚠️ 无法加载cairosvg，SVG转换将失败: {e}")
+    _worker_converter = SVGIconConverter()
+    _worker_converter.set_encoder_preset(preset)
+
+def _convert_in_worker(kind, filename, data):
+    """在工作进程中转换单个文件，返回 (zip字节流, 输出日志)
+
+    源文件和输出都只在内存中，不读写临时目录。有图标生成失败时不返回不完整的图标集，
+    zip字节流为None，失败原因见输出日志
+    """
+    converter = _worker_converter
+    log = StringIO()
+    files = {}
+    with redirect_stdout(log):
+        try:
+            files = converter.convert_to_bundle(kind, Path(filename), data)
+        except Exception as e:
+            print(f"❌ 处理{kind.upper()}文件 {filename} 时出错: {e}")
+        missing = [name for name in converter.output_names() if name not in files]
+        if files and missing:
+            print(f"❌ {len(missing)} 个文件生成失败: {', '.join(missing)}")
+    if missing:
+        return None, log.getvalue()
+
+    bundle = BytesIO()
+    with zipfile.ZipFile(bundle, 'w', zipfile.ZIP_STORED) as archive:
+        for name in sorted(files):
+            archive.writestr(name, files[name])
+    return bundle.getvalue(), log.getvalue()
+
+class IconConversionService:
+    """图标转换服务：常驻的隔离工作进程池 + 有界请求队列
+
+    单个请求超过时间上限或工作进程超出内存上限时，该工作进程被终止并重启，
+    其他请求不受影响
+    """
+
+    def __init__(self, workers=None, queue_size=None, preset='balanced', max_upload_bytes=20 * 1024 * 1024,
+                 timeout=30, memory_limit=2048 * 1024 * 1024):
+        self.workers = workers or os.cpu_count() or 1
+        # 排队中和处理中的请求总数上限，超出时返回503
+        self.queue_size = queue_size or self.workers * 4
+        self.preset = preset
+        self.max_upload_bytes = max_upload_bytes
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._pool = None
+        self.stats = {'accepted': 0, 'rejected': 0, 'failed': 0, 'killed': 0, 'completed': 0}
+
+    def start(self):
+        # 工作进程启动时即加载依赖
+        self._pool = IsolatedProcessPool(
+            self.workers,
+            timeout=self.timeout,
+            memory_limit=self.memory_limit,
+            initializer=_init_worker,
+            initargs=(self.preset,),
+        )
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def reserve(self):
+        """在读取请求体之前占用一个队列位置，队列已满时返回False"""
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            return False
+        self._count('accepted')
+        return True
+
+    def release(self):
+        """释放已占用但没有提交任务的队列位置"""
+        self._slots.release()
+
+    def submit(self, kind, filename, data):
+        """提交已通过reserve()占用队列位置的转换请求，返回Future，任务完成时释放该位置"""
+        try:
+            future = self._pool.submit(_convert_in_worker, kind, filename, data)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def health(self):
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            'status': 'ok',
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'worker_restarts': self._pool.restarts if self._pool else 0,
+            **stats,
+        }
+
+def _detect_kind(filename, content_type, data):
+    """根据文件名、Content-Type或文件头判断输入类型"""
+    suffix = Path(filename).suffix.lower() if filename else ''
+    if suffix in ('.svg', '.png'):
+        return suffix[1:]
+    if 'svg' in content_type:
+        return 'svg'
+    if 'png' in content_type or data.startswith(b'\x89PNG'):
+        return 'png'
+    return 'svg'
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body, content_type='application/json; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), headers=headers)
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0:
+            self._send_json(400, {'error': '请求体为空'})
+            return
+        if length > self.service.max_upload_bytes:
+            self._send_json(413, {'error': f'文件超过上限 {self.service.max_upload_bytes} 字节'})
+            return
+        # 先占用队列位置再读取请求体：队列已满时不读取上传内容，直接返回503并关闭连接，
+        # 并发上传不会在被拒绝之前占用 连接数×上传上限 的内存
+        if not self.service.reserve():
+            self.close_connection = True
+            self._send_json(503, {'error': '服务繁忙，请稍后重试'}, headers={'Retry-After': '1'})
+            return
+        try:
+            data = self.rfile.read(length)
+            if len(data) < length:
+                raise ConnectionError("请求体不完整")
+            query = parse_qs(url.query)
+            kind = _detect_kind(query.get('name', [''])[0], self.headers.get('Content-Type', ''), data)
+            # 只保留文件名部分，防止路径穿越
+            name = Path(query.get('name', [''])[0]).name
+            stem = Path(name).stem or 'icon'
+            filename = f"{stem}.{kind}"
+        except BaseException:
+            self.service.release()
+            raise
+        # submit失败时自行释放队列位置
+        future = self.service.submit(kind, filename, data)
+
+        try:
+            bundle, log = future.result()
+        except WorkerTimeout as e:
+            self.service._count('killed')
+            self._send_json(422, {'error': f'转换时间{e}，已终止'})
+            return
+        except WorkerCrashed as e:
+            self.service._count('killed')
+            self._send_json(422, {'error': f'转换进程异常退出 ({e})，可能超出内存上限'})
+            return
+        except Exception as e:
+            self.service._count('failed')
+            self._send_json(500, {'error': f'转换失败: {e}'})
+            return
+
+        if bundle is None:
+            self.service._count('failed')
+            self._send_json(422, {'error': '有图标生成失败', 'log': log})
+            return
+
+        self.service._count('completed')
+        self._send(200, bundle, 'application/zip', headers={
+            'Content-Disposition': f'attachment; filename="{stem}-icons.zip"',
+        })
+
+    def log_message(self, format, *args):
+        print(f"[{self.log_date_time_string()}] {self.address_string()} {format % args}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="常驻的SVG/PNG图标转换HTTP服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (默认: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口 (默认: 8765)")
+    parser.add_argument("--workers", type=int, default=0, help="工作进程数 (默认: CPU核心数)")
+    parser.add_argument("--queue-size", type=int, default=0, help="最大排队请求数 (默认: 工作进程数×4)")
+    parser.add_argument(
+        "--preset", choices=sorted(PNG_ENCODER_PRESETS), default='balanced',
+        help="PNG编码预设 (默认: balanced)",
+    )
+    parser.add_argument("--max-upload-mb", type=int, default=20, help="单个上传文件大小上限，单位MB (默认: 20)")
+    parser.add_argument("--timeout", type=float, default=30, help="单个请求的转换时间上限，单位秒，0 表示不限制 (默认: 30)")
+    parser.add_argument(
+        "--memory-limit-mb", type=int, default=2048,
+        help="每个工作进程的内存 (地址空间) 上限，单位MB，0 表示不限制 (默认: 2048)",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    service = IconConversionService(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        preset=args.preset,
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+        timeout=args.timeout or None,
+        memory_limit=args.memory_limit_mb * 1024 * 1024 or None,
+    )
+    service.start()
+    ServiceRequestHandler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), ServiceRequestHandler)
+
+    print("🎨 SVG/PNG图标转换服务")
+    print(f"工作进程: {service.workers}, 队列上限: {service.queue_size}")
+    timeout_text = f"{args.timeout:g}s" if args.timeout else "不限"
+    memory_text = f"{args.memory_limit_mb}MB" if args.memory_limit_mb else "不限"
+    print(f"单个请求上限: 超时 {timeout_text}, 内存 {memory_text}")
+    print(f"监听地址: http://{args.host}:{args.port}")
+    print(f"使用示例: curl --data-binary @logo.svg -o icons.zip \"http://{args.host}:{args.port}/convert?name=logo.svg\"")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止服务...")
+    finally:
+        server.server_close()
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+转换结果的输出方式
+目录 (原子替换)、每个输入文件一个zip/tar归档、整个批次共用一个归档，以及不写磁盘的内存包。
+写入器都提供 write(name, data) 和以文件对象写入的 open(name)，并作为上下文管理器使用：
+正常退出时提交，出错时丢弃
+"""
+
+import glob
+import os
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+
+ARCHIVE_FORMATS = ('zip', 'tar')
+
+def _temp_name(path, suffix):
+    """与path同目录的隐藏临时文件名，多进程、多线程同时写入时互不冲突"""
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.{suffix}")
+
+def remove_partial_outputs(path):
+    """删除写入path时被中断 (如工作进程被终止) 遗留的临时文件或目录"""
+    path = Path(path)
+    for partial in path.parent.glob(f".{glob.escape(path.name)}.*.tmp"):
+        if partial.is_dir():
+            shutil.rmtree(partial, ignore_errors=True)
+        else:
+            try:
+                partial.unlink()
+            except OSError:
+                pass
+
+class OutputWriter:
+    """输出写入器基类"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    def write(self, name, data):
+        raise NotImplementedError
+
+    @contextmanager
+    def open(self, name):
+        """以可seek的文件对象写入name，默认先写入内存，完成后交给write"""
+        buffer = BytesIO()
+        yield buffer
+        self.write(name, buffer.getvalue())
+
+    def commit(self):
+        pass
+
+    def abort(self):
+        pass
+
+class FileWriter(OutputWriter):
+    """直接写入已存在的目录"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, name):
+        path = self.directory / name
+        if '/' in name:
+            # 文件名可包含子目录 (如 mipmap-hdpi/ic_launcher.png)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def write(self, name, data):
+        with open(self._path(name), 'wb') as f:
+            f.write(data)
+
+    @contextmanager
+    def open(self, name):
+        """直接写入目标文件，不经过内存中转；写入出错时删除写了一半的文件"""
+        path = self._path(name)
+        try:
+            with open(path, 'wb') as f:
+                yield f
+        except BaseException:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            raise
+
+class DirectoryWriter(FileWriter):
+    """先写入同级的临时目录，完成后整体替换目标目录，读取方不会看到写了一半的目录"""
+
+    def __init__(self, directory):
+        self.target = Path(directory)
+        super().__init__(_temp_name(self.target, 'tmp'))
+
+    def __enter__(self):
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir()
+        return self
+
+    def commit(self):
+        if not self.target.exists():
+            os.rename(self.directory, self.target)
+            return
+        # 输出目录中的子目录属于其他输入 (如 input/logo.svg 与 input/logo/a.svg)，随新目录保留
+        for entry in os.scandir(self.target):
+            if entry.is_dir(follow_symlinks=False) and not (self.directory / entry.name).exists():
+                os.rename(entry.path, self.directory / entry.name)
+        # 目录不能直接覆盖：先把旧目录移开，再换入新目录
+        old = _temp_name(self.target, 'old')
+        shutil.rmtree(old, ignore_errors=True)
+        os.rename(self.target, old)
+        os.rename(self.directory, self.target)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def abort(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class MemoryWriter(OutputWriter):
+    """在内存中收集输出 {文件名: 字节}，不写磁盘；提交时调用on_commit(files)"""
+
+    def __init__(self, on_commit=None):
+        self.files = {}
+        self._on_commit = on_commit
+
+    def write(self, name, data):
+        self.files[name] = data
+
+    def commit(self):
+        if self._on_commit is not None:
+            self._on_commit(self.files)
+
+class _ArchiveFile:
+    """流式写入zip或tar归档，可在多个编码线程中同时写入
+
+    PNG和ICO已经压缩过，zip条目不再压缩
+    """
+
+    def __init__(self, fileobj, format):
+        self.format = format
+        if format == 'zip':
+            self._archive = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_STORED)
+        else:
+            self._archive = tarfile.open(fileobj=fileobj, mode='w')
+        self._lock = threading.Lock()
+
+    def add(self, name, data):
+        with self._lock:
+            if self.format == 'zip':
+                self._archive.writestr(name, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                info.mode = 0o644
+                self._archive.addfile(info, BytesIO(data))
+
+    def close(self):
+        self._archive.close()
+
+class ArchiveWriter(OutputWriter):
+    """一个输入文件的全部输出写为一个zip/tar归档，先写临时文件，完成后原子替换"""
+
+    def __init__(self, path, format):
+        self.path = Path(path)
+        self.format = format
+        self._tmp_path = _temp_name(self.path, 'tmp')
+        self._file = None
+        self._archive = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp_path, 'wb')
+        self._archive = _ArchiveFile(self._file, self.format)
+        return self
+
+    def write(self, name, data):
+        self._archive.add(name, data)
+
+    def commit(self):
+        self._archive.close()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.unlink(self._tmp_path)
+        except OSError:
+            pass
+
+class BundleCollector:
+    """在内存中收集多个输入文件的输出 {前缀: {文件名: 字节}}
+
+    在工作进程中代替BatchArchive，收集的结果交给主进程写入归档
+    """
+
+    def __init__(self):
+        self.bundles = {}
+
+    def open_set(self, prefix):
+        """一个输入文件的写入器，输出完整后才一次性交给write_bundle"""
+        return MemoryWriter(lambda files: self.write_bundle(prefix, files))
+
+    def write_bundle(self, prefix, files):
+        self.bundles[prefix] = dict(files)
+
+class BatchArchive(BundleCollector):
+    """整个批次写入同一个zip/tar归档，条目名为 "前缀/文件名"
+
+    先写临时文件，提交时原子替换。未变化的输入通过carry_over从上一次的归档中复制条目，
+    已删除的输入不再复制，其输出随之从归档中移除
+    """
+
+    def __init__(self, path, format):
+        self.path = Path(path)
+        self.format = format
+        self.names = set()
+        self._previous = None
+        self._previous_names = {}
+        self._open_previous()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = _temp_name(self.path, 'tmp')
+        self._file = open(self._tmp_path, 'wb')
+        self._archive = _ArchiveFile(self._file, format)
+
+    def _open_previous(self):
+        try:
+            if self.format == 'zip':
+                self._previous = zipfile.ZipFile(self.path)
+                self._previous_names = {name: name for name in self._previous.namelist()}
+            else:
+                self._previous = tarfile.open(self.path)
+                self._previous_names = {member.name: member for member in self._previous.getmembers()}
+        except (OSError, zipfile.BadZipFile, tarfile.TarError):
+            self._previous = None
+            self._previous_names = {}
+
+    def _add(self, name, data):
+        # 同名输入 (如logo.svg和logo.png) 的输出只保留先写入的一份
+        if name in self.names:
+            return
+        self.names.add(name)
+        self._archive.add(name, data)
+
+    def write_bundle(self, prefix, files):
+        for name, data in files.items():
+            self._add(f"{prefix}/{name}", data)
+
+    def contains(self, name):
+        return name in self.names
+
+    def carry_over(self, names):
+        """从上一次的归档复制这些条目，全部存在时返回True，否则不复制任何条目"""
+        if not all(name in self._previous_names for name in names):
+            return False
+        for name in names:
+            if self.format == 'zip':
+                data = self._previous.read(name)
+            else:
+                data = self._previous.extractfile(self._previous_names[name]).read()
+            self._add(name, data)
+        return True
+
+    def _close(self):
+        self._archive.close()
+        self._file.close()
+        if self._previous is not None:
+            self._previous.close()
+
+    def commit(self):
+        self._close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._close()
+        try:
+            os.unlink(self._tmp_path)
+        except OSError:
+            pass
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""测试从仓库根目录导入 convert.py 等顶层模块"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
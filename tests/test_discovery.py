@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""输入文件发现：输出目录嵌套在输入目录内时，不把生成的图标当作输入"""
+
+import pytest
+
+from convert import SVGIconConverter
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'')
+    return path
+
+def test_nested_output_dir_is_not_scanned(tmp_path):
+    assets = tmp_path / "assets"
+    svg = touch(assets / "logo.svg")
+    png = touch(assets / "icons" / "app.png")
+    touch(assets / "out" / "logo" / "favicon.png")
+    touch(assets / ".cache" / "hidden.svg")
+
+    converter = SVGIconConverter(input_dir=assets, output_dir=assets / "out")
+    found = list(converter.iter_input_files())
+
+    assert found == [('svg', svg), ('png', png)]
+
+def test_output_dir_equal_to_input_dir_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        SVGIconConverter(input_dir=tmp_path, output_dir=tmp_path / ".")
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""SVG渲染会话：复用同一份解析结果渲染多个尺寸，结果应与每次单独调用cairosvg相同"""
+
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+try:
+    import cairosvg
+except (ImportError, OSError):  # 未安装cairosvg或缺少libcairo
+    cairosvg = None
+
+from convert import SVGRenderSession
+
+pytestmark = pytest.mark.skipif(cairosvg is None, reason="需要cairosvg和libcairo")
+
+# 使用mask和objectBoundingBox单位的pattern：cairosvg绘制时会修改这两种节点
+MASK_PATTERN_SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">
+  <defs>
+    <mask id="half">
+      <rect x="0" y="0" width="64" height="40" fill="white"/>
+      <circle cx="32" cy="48" r="10" fill="#808080"/>
+    </mask>
+    <pattern id="dots" width="0.25" height="0.25">
+      <rect width="16" height="16" fill="#1e40af"/>
+      <circle cx="8" cy="8" r="5" fill="#f59e0b"/>
+    </pattern>
+  </defs>
+  <rect x="4" y="4" width="56" height="56" rx="12" fill="url(#dots)" mask="url(#half)"/>
+</svg>"""
+
+def _pixels(png_data):
+    with Image.open(BytesIO(png_data)) as image:
+        return image.convert('RGBA').tobytes()
+
+def test_reused_tree_matches_fresh_render_at_every_size():
+    session = SVGRenderSession(Path("mask-pattern.svg"), MASK_PATTERN_SVG)
+    # 与转换器相同，从小到大依次渲染
+    for size in (16, 64, 128):
+        dpi = max(72, size * 2)
+        expected = cairosvg.svg2png(
+            bytestring=MASK_PATTERN_SVG, dpi=dpi,
+            output_width=size, output_height=size, background_color=None)
+        assert _pixels(session.render(size, dpi)) == _pixels(expected), f"{size}px"
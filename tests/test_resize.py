@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""PNG降采样金字塔：各配置尺寸的结果与直接从原图LANCZOS缩放的差异在容差内"""
+
+import random
+
+import pytest
+from PIL import Image, ImageChops, ImageStat
+
+from benchmark import make_png
+from convert import PNGRenderSession, SVGIconConverter
+from profiles import SIZE_PROFILES
+
+SOURCE_SIZE = 4096
+
+# 预乘透明度空间中各通道的平均差值和最大差值上限 (0-255)
+MAX_MEAN_DIFF = 1.5
+MAX_PIXEL_DIFF = 12
+
+def _configured_sizes():
+    converter = SVGIconConverter(profile=list(SIZE_PROFILES))
+    return converter.plan_sizes(converter.build_render_plan())
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pyramid") / "source.png"
+    make_png(path, SOURCE_SIZE, random.Random(20240601))
+    session = PNGRenderSession(path)
+    return session, session.image.convert('RGBa')
+
+@pytest.mark.parametrize('size', _configured_sizes())
+def test_pyramid_matches_direct_lanczos(source, size):
+    session, original = source
+    pyramid = session.resize(size).convert('RGBa')
+    direct = original.resize((size, size), Image.Resampling.LANCZOS)
+    diff = ImageChops.difference(pyramid, direct)
+    mean = max(ImageStat.Stat(diff).mean)
+    peak = max(high for _, high in diff.getextrema())
+    assert mean <= MAX_MEAN_DIFF, f"{size}px 平均差值 {mean:.2f}"
+    assert peak <= MAX_PIXEL_DIFF, f"{size}px 最大差值 {peak}"
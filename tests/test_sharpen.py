@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""预乘透明度锐化：与直接对RGBA做UnsharpMask的结果相比，不透明像素和边缘像素的差异在容差内"""
+
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from convert import SVGIconConverter, unsharp_mask_premultiplied
+
+SHARPEN_OPTIONS = SVGIconConverter().sharpen_options
+
+# 颜色差值上限 (0-255)：边缘像素按预乘值比较，直接锐化会把透明区域的颜色带入边缘
+OPAQUE_MAX_MEAN = 5
+OPAQUE_MAX_DIFF = 40
+EDGE_MAX_MEAN = 10
+EDGE_MAX_DIFF = 48
+
+def _icon(size, fill):
+    """先在大画布上绘制圆形图标，再像SVG尺寸修正一样在预乘空间中LANCZOS缩小"""
+    image = Image.new('RGBA', (512, 512), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((40, 40, 472, 472), fill=fill)
+    draw.rectangle((200, 120, 312, 392), fill=(255, 255, 255, 255))
+    return image.convert('RGBa').resize((size, size), Image.Resampling.LANCZOS).convert('RGBA')
+
+def _pixels(image):
+    data = image.tobytes()
+    return [tuple(data[i:i + 4]) for i in range(0, len(data), 4)]
+
+def _premultiplied(pixel):
+    return [channel * pixel[3] / 255 for channel in pixel[:3]]
+
+def _color_diffs(old, new, indices, premultiply=False):
+    convert = _premultiplied if premultiply else (lambda pixel: pixel[:3])
+    return [max(abs(a - b) for a, b in zip(convert(old[i]), convert(new[i]))) for i in indices]
+
+@pytest.mark.parametrize('size', [16, 32])
+@pytest.mark.parametrize('fill', [(59, 130, 246, 255), (220, 40, 40, 255)])
+def test_premultiplied_sharpen_matches_direct_unsharp_mask(size, fill):
+    image = _icon(size, fill)
+    source = _pixels(image)
+    old = _pixels(image.filter(ImageFilter.UnsharpMask(**SHARPEN_OPTIONS)))
+    new = _pixels(unsharp_mask_premultiplied(image, **SHARPEN_OPTIONS))
+
+    assert [pixel[3] for pixel in new] == [pixel[3] for pixel in old]
+
+    opaque = [i for i, pixel in enumerate(source) if pixel[3] == 255]
+    diffs = _color_diffs(old, new, opaque)
+    assert sum(diffs) / len(diffs) <= OPAQUE_MAX_MEAN
+    assert max(diffs) <= OPAQUE_MAX_DIFF
+
+    edge = [i for i, pixel in enumerate(source) if 0 < pixel[3] < 255]
+    diffs = _color_diffs(old, new, edge, premultiply=True)
+    assert sum(diffs) / len(diffs) <= EDGE_MAX_MEAN
+    assert max(diffs) <= EDGE_MAX_DIFF
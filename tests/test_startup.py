@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""启动耗时：convert.py --help 的模块导入在预算内，且不加载PIL和cairo
+
+可单独作为提交前检查运行: python -m pytest tests/test_startup.py
+"""
+
+from benchmark import DEFAULT_STARTUP_BUDGET_MS, measure_startup
+
+# 导入耗时受磁盘缓存和机器负载影响，取多次测量中最快的一次
+ATTEMPTS = 3
+
+def test_help_imports_within_budget():
+    results = [measure_startup(DEFAULT_STARTUP_BUDGET_MS) for _ in range(ATTEMPTS)]
+    for result in results:
+        assert not result['heavy_imports'], f"--help 加载了重量级依赖: {result['heavy_imports']}"
+    fastest = min(result['import_ms'] for result in results)
+    assert fastest <= DEFAULT_STARTUP_BUDGET_MS, f"启动导入耗时 {fastest:.1f} ms 超过预算 {DEFAULT_STARTUP_BUDGET_MS} ms"
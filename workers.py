@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+隔离的工作进程池
+每个任务在独立的工作进程中执行，可限制单个任务的运行时间和工作进程的地址空间。
+超时的工作进程会被终止，异常退出 (如超出内存上限、被系统终止) 的工作进程会被重启，
+其他任务不受影响
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+class WorkerTimeout(Exception):
+    """任务超过时间上限，所在的工作进程已被终止"""
+
+class WorkerCrashed(Exception):
+    """工作进程在执行任务时异常退出"""
+
+def _worker_main(conn, memory_limit, initializer, initargs):
+    """工作进程主循环：逐个接收 (函数, 参数) 并返回结果"""
+    import signal
+    # Ctrl+C 由主进程处理，工作进程由主进程负责停止
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if memory_limit:
+        import resource
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = memory_limit if hard == resource.RLIM_INFINITY else min(memory_limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            result = ('result', fn(*args))
+        except BaseException as e:
+            result = ('error', e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # 结果或异常无法序列化
+            conn.send(('error', RuntimeError(f"无法返回任务结果: {e}")))
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.future = None
+        self.deadline = None
+
+class IsolatedProcessPool:
+    """接口与ProcessPoolExecutor类似的进程池：submit(fn, *args) 返回Future
+
+    timeout 为单个任务的运行时间上限 (秒)，超时的任务以WorkerTimeout失败；
+    memory_limit 为每个工作进程的地址空间上限 (字节，仅支持Unix)，
+    超出时分配内存失败，工作进程异常退出时任务以WorkerCrashed失败。
+    两种情况下都会启动新的工作进程替代，排队中的任务继续执行
+    """
+
+    def __init__(self, max_workers, timeout=None, memory_limit=None, initializer=None, initargs=()):
+        import multiprocessing
+        self._context = multiprocessing.get_context()
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        if memory_limit and os.name != 'posix':
+            print("⚠️ 当前系统不支持限制工作进程内存，将忽略内存上限")
+            self.memory_limit = None
+        self.initializer = initializer
+        self.initargs = initargs
+        self.restarts = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._wakeup_reader, self._wakeup_writer = self._context.Pipe(duplex=False)
+        self._workers = [self._start_worker() for _ in range(max_workers)]
+        self._thread = threading.Thread(target=self._dispatch, name="isolated-pool", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(cancel_futures=exc_type is not None)
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit, self.initializer, self.initargs),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    def _replace_worker(self, worker):
+        """终止并替换工作进程"""
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+        self.restarts += 1
+        self._workers[self._workers.index(worker)] = self._start_worker()
+        return worker.process.exitcode
+
+    def _wakeup(self):
+        with self._lock:
+            self._wakeup_writer.send_bytes(b'\0')
+
+    def submit(self, fn, *args):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("进程池已关闭")
+            self._pending.append((future, fn, args))
+        self._wakeup()
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """停止接收任务；wait=True 时等待已提交的任务完成后停止工作进程"""
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+        self._wakeup()
+        if wait:
+            self._thread.join()
+
+    def _assign_tasks(self):
+        """把排队中的任务交给空闲的工作进程"""
+        for worker in list(self._workers):
+            while worker.future is None:
+                with self._lock:
+                    if not self._pending:
+                        return
+                    future, fn, args = self._pending.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    worker.conn.send((fn, args))
+                except (OSError, ValueError):
+                    # 空闲的工作进程已退出：重启后重新排队
+                    with self._lock:
+                        self._pending.appendleft((future, fn, args))
+                    self._replace_worker(worker)
+                    break
+                except Exception as e:
+                    # 任务参数无法序列化
+                    future.set_exception(e)
+                    continue
+                worker.future = future
+                worker.deadline = time.monotonic() + self.timeout if self.timeout else None
+
+    def _dispatch(self):
+        """调度线程：分配任务、接收结果、终止超时的工作进程"""
+        from multiprocessing.connection import wait
+        while True:
+            self._assign_tasks()
+            busy = [worker for worker in self._workers if worker.future is not None]
+            with self._lock:
+                if self._shutdown and not busy and not self._pending:
+                    break
+
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            wait_timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([worker.conn for worker in busy] + [self._wakeup_reader], wait_timeout)
+
+            if self._wakeup_reader in ready:
+                while self._wakeup_reader.poll():
+                    self._wakeup_reader.recv_bytes()
+
+            now = time.monotonic()
+            for worker in busy:
+                future = worker.future
+                if worker.conn in ready:
+                    try:
+                        status, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        exitcode = self._replace_worker(worker)
+                        future.set_exception(WorkerCrashed(f"退出码 {exitcode}"))
+                        continue
+                    worker.future = None
+                    worker.deadline = None
+                    if status == 'result':
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                elif worker.deadline is not None and now >= worker.deadline:
+                    self._replace_worker(worker)
+                    future.set_exception(WorkerTimeout(f"超过 {self.timeout:g} 秒"))
+
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()